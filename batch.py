@@ -0,0 +1,169 @@
+"""无界面批量对局：多进程并行跑 N 局固定种子的比赛，汇总胜率、对局长度和各阵营数值曲线
+
+    python batch.py --matches 200 --levels 0 5 10
+    python batch.py --matches 50 --scaling      # 比较不同进程数下的局/秒
+    python batch.py --matches 50 --planner      # 黄阵营改用前瞻规划，和规则 AI 对比
+    python batch.py --matches 50 --camps 7      # 七个阵营混战
+    python batch.py --matches 20 --width 2400 --height 1200 --camp-balls 20 --gray-balls 200   # 大地图
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import Engine
+from planner import Planner
+
+
+def play_match(job):
+    """跑一局，返回结果、帧数和每隔 sample_every 帧采样的各阵营数值总和"""
+    seed, level, max_frames, sample_every, autoplay, planner, camp_count, board = job
+    engine = Engine(seed=seed, camp_count=camp_count, **board)
+    engine.autoplay = autoplay
+    if level:
+        engine.level = level
+        engine.randomize_balls()
+    if planner:
+        # 推演次数固定、不限时，保证同一种子结果可复现
+        engine.ai.planner = Planner(engine, budget_ms=None, camps=[engine.camps[1]], **planner)
+    camps = []
+    for ball in engine.balls:
+        if ball.camp not in camps:
+            camps.append(ball.camp)
+    curves = {camp.name: [] for camp in camps}
+    result = None
+    for frame in range(max_frames):
+        if frame % sample_every == 0:
+            for camp in camps:
+                curves[camp.name].append(engine.camp_index.total(camp))
+        result = engine.update_game_logic()
+        if result is not None:
+            break
+    return {
+        "seed": seed,
+        "level": level,
+        "result": result,
+        "frames": engine.frame_count,
+        "curves": curves,
+    }
+
+
+def make_jobs(matches, levels, seed=0, max_frames=60 * 60 * 10, sample_every=60, autoplay=True, planner=None,
+              camp_count=2, board=None):
+    # 每关都用同一组种子，方便对比不同关卡；planner 为 Planner 的参数字典，None 表示不用；
+    # board 为传给 Engine 的场地参数（width、height、camp_balls、gray_count），None 表示默认场地
+    board = board or {}
+    return [(seed + i, level, max_frames, sample_every, autoplay, planner, camp_count, board)
+            for level in levels for i in range(matches)]
+
+
+def run_batch(jobs, workers=None):
+    """并行跑完所有对局，返回 (结果列表, 耗时秒)"""
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1:
+        results = [play_match(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(play_match, jobs, chunksize=chunksize))
+    return results, time.perf_counter() - start
+
+
+def mean_curve(curves):
+    """按采样点取平均；提前结束的对局沿用最后一个值"""
+    length = max(len(c) for c in curves)
+    padded = [c + [c[-1]] * (length - len(c)) if c else [0] * length for c in curves]
+    return [round(sum(col) / len(col), 2) for col in zip(*padded)]
+
+
+def aggregate(results):
+    """按关卡汇总：胜/负/超时、胜率、对局帧数、各阵营平均数值曲线"""
+    by_level = {}
+    for r in results:
+        by_level.setdefault(r["level"], []).append(r)
+    summary = {}
+    for level in sorted(by_level):
+        rs = by_level[level]
+        frames = [r["frames"] for r in rs]
+        names = []
+        for r in rs:
+            for name in r["curves"]:
+                if name not in names:
+                    names.append(name)
+        summary[level] = {
+            "matches": len(rs),
+            "wins": sum(r["result"] == "win" for r in rs),
+            "losses": sum(r["result"] == "lose" for r in rs),
+            "timeouts": sum(r["result"] is None for r in rs),
+            "win_rate": sum(r["result"] == "win" for r in rs) / len(rs),
+            "mean_frames": statistics.mean(frames),
+            "median_frames": statistics.median(frames),
+            "curves": {name: mean_curve([r["curves"].get(name, []) for r in rs]) for name in names},
+        }
+    return summary
+
+
+def scaling(jobs, max_workers=None):
+    """同一批对局分别用 1, 2, 4, ... 个进程跑，返回 [(进程数, 局/秒)]"""
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    report = []
+    for workers in counts:
+        _, elapsed = run_batch(jobs, workers)
+        report.append((workers, len(jobs) / elapsed))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量对局")
+    parser.add_argument("--matches", type=int, default=100, help="每关对局数")
+    parser.add_argument("--levels", type=int, nargs="+", default=[0], help="要跑的关卡")
+    parser.add_argument("--seed", type=int, default=0, help="起始种子，第 i 局用 seed+i")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认等于CPU核数")
+    parser.add_argument("--max-frames", type=int, default=60 * 60 * 10, help="单局帧数上限，超过算超时")
+    parser.add_argument("--sample-every", type=int, default=60, help="数值曲线采样间隔（帧）")
+    parser.add_argument("--idle-player", action="store_true", help="玩家阵营不托管给AI（原地不动）")
+    parser.add_argument("--planner", action="store_true", help="黄阵营用前瞻规划代替规则AI")
+    parser.add_argument("--horizon", type=int, default=180, help="前瞻规划每次推演的帧数")
+    parser.add_argument("--rollouts", type=int, default=2, help="前瞻规划每个候选的推演次数")
+    parser.add_argument("--camps", type=int, default=2, help="参战阵营数（不含灰色），最多 7")
+    parser.add_argument("--width", type=int, default=1200, help="场地宽（像素）")
+    parser.add_argument("--height", type=int, default=600, help="场地高（像素）")
+    parser.add_argument("--camp-balls", type=int, default=4, help="每个阵营开局几个球")
+    parser.add_argument("--gray-balls", type=int, default=9, help="开局几个灰球")
+    parser.add_argument("--scaling", action="store_true", help="测量不同进程数下的局/秒")
+    parser.add_argument("--out", help="把汇总和每局结果写到 JSON 文件")
+    args = parser.parse_args(argv)
+
+    planner = {"horizon": args.horizon, "rollouts": args.rollouts} if args.planner else None
+    board = {"width": args.width, "height": args.height, "camp_balls": args.camp_balls, "gray_count": args.gray_balls}
+    jobs = make_jobs(args.matches, args.levels, args.seed, args.max_frames,
+                     args.sample_every, not args.idle_player, planner, args.camps, board)
+    if args.scaling:
+        base = None
+        for workers, rate in scaling(jobs, args.workers):
+            base = base or rate
+            print(f"进程数 {workers:3d}: {rate:8.2f} 局/秒  加速比 {rate / base:5.2f}")
+        return
+
+    results, elapsed = run_batch(jobs, args.workers)
+    summary = aggregate(results)
+    print(f"{len(results)} 局，用时 {elapsed:.1f} 秒，{len(results) / elapsed:.2f} 局/秒")
+    for level, s in summary.items():
+        print(f"第{level}关: 胜 {s['wins']} 负 {s['losses']} 超时 {s['timeouts']}  "
+              f"胜率 {s['win_rate']:.1%}  平均 {s['mean_frames']:.0f} 帧  中位 {s['median_frames']:.0f} 帧")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "matches": results}, f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
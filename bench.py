@@ -0,0 +1,270 @@
+"""热点基准：按给定规模造出局面（球数、路径数、飞行中的小球数、阵营数），
+分别计时一步 update_game_logic、一次 AI.update、一次抵消检测和一次离屏绘制
+
+每次计时前都用快照把局面恢复成同一个状态，只计被测的那一段。
+结果可以写成 JSON，也可以和存下来的基线对比：
+
+    python bench.py                          # 跑全部场景，打印表格
+    python bench.py --scenario large --case step cancel
+    python bench.py --save-baseline          # 写入 bench_baseline.json
+    python bench.py --compare                # 和基线对比，变慢超过容差时退出码为 1
+
+机器快慢不同，毫秒数没法直接比。每次运行先在同一个进程里跑一段固定的校准负载，
+对比时用 各项耗时 / 校准耗时 的比值，换一台机器也大致可比；
+不过解释器、numpy 版本或 CPU 不同时比值也会漂，最好在本机重新存一份基线（--save-baseline）。
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from engine import AI, Ball, Engine, Path
+from projectiles import flight_ticks
+from snapshot import restore, snapshot
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# 名称 -> (球数, 路径数, 飞行中的小球数, 阵营数)
+SCENARIOS = {
+    "small": (17, 10, 200, 3),
+    "medium": (60, 60, 2000, 5),
+    "large": (200, 300, 20000, 8),
+}
+CASES = ("step", "ai", "cancel", "cancel_streams", "draw_batched", "draw_legacy")
+HOST_KEYS = ("python", "numpy", "machine", "system", "processor")
+
+
+
+def build_state(n_balls, n_paths, n_projectiles, n_camps, seed=0):
+    """造一局指定规模的局面：球随机摆放、阵营轮流分配，小球分布在各条路径的不同位置上"""
+    rng = random.Random(seed)
+    engine = Engine(seed=seed)
+    engine.autoplay = True
+    camps = engine.camps[:max(3, n_camps)]
+    engine.camp_count = len(camps) - 1  # 不含灰色
+    radius = 30 if n_balls <= 60 else 15
+    balls = []
+    for i in range(n_balls):
+        for _ in range(100):
+            x = rng.randint(40, 1160)
+            y = rng.randint(40, 560)
+            if all(math.hypot(x - b.pos[0], y - b.pos[1]) > 2 * radius for b in balls):
+                break
+        ball = Ball((x, y), camps[i % len(camps)], value=rng.randint(5, 100), radius=radius)
+        ball.idx = i
+        balls.append(ball)
+    engine.balls = balls
+    engine.camp_index.rebuild(balls)
+    engine.distances.rebuild(balls)
+    engine.growth.reset(n_balls, 0)
+    engine.ai = AI(engine)
+
+    gray = engine.gray_camp
+    owners = [b for b in balls if b.camp is not gray]
+    paths = []
+    while len(paths) < n_paths:
+        start = rng.choice(owners)
+        end = rng.choice(balls)
+        if end is start or (start.idx, end.idx) in engine.paths:
+            continue
+        path = Path(start.idx, end.idx, f"测试({start.idx+1}->{end.idx+1})", start.camp)
+        engine.paths.add(path)
+        paths.append(path)
+
+    # 小球按发射先后生成，已经飞了 0 ~ 飞行帧数-1 帧
+    shots = []
+    for _ in range(n_projectiles):
+        path = rng.choice(paths)
+        s, e = balls[path.start_idx], balls[path.end_idx]
+        angle = math.atan2(e.pos[1] - s.pos[1], e.pos[0] - s.pos[0])
+        vel = [math.cos(angle), math.sin(angle)]
+        shots.append((-rng.randrange(flight_ticks(s.pos, vel, e.pos, e.radius)), s, e, vel))
+    store = engine.projectiles
+    for launch, s, e, vel in sorted(shots, key=lambda shot: shot[0]):
+        store.tick = launch
+        store.spawn(s.pos, vel, e, s.camp)
+    store.tick = 0
+    return engine
+
+
+def time_calls(fn, reps, setup=None):
+    """每次先 setup（不计时）再计时 fn，返回各次耗时（秒）"""
+    times = []
+    for _ in range(reps):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def calibration_work():
+    """校准负载：一段纯 Python 循环加一段小数组的 numpy 运算，和被测的各项用到的差不多"""
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    a = np.arange(4000, dtype=np.float64)
+    for _ in range(200):
+        a = np.sqrt(a * a + 1.0)
+    return total
+
+
+def calibrate(reps=21):
+    """校准负载的中位耗时（毫秒）"""
+    calibration_work()
+    return round(statistics.median(time_calls(calibration_work, reps)) * 1000, 4)
+
+
+def make_renderer(mode, size):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from render import Renderer, load_font
+    pygame.font.init()
+    return Renderer(pygame.Surface(size), load_font(24), mode=mode)
+
+
+def run_case(engine, data, case, reps):
+    def reset():
+        restore(engine, data)
+
+    def reset_ai():
+        restore(engine, data)
+        # 所有阵营都到了可以行动的时候
+        engine.ai.last_action_time = {camp: -10 ** 9 for camp in engine.camps}
+        engine.ai.reschedule()
+
+    def reset_streams():
+        restore(engine, data)
+        engine.set_cancel_mode("streams")
+        # 造出来的小球之间在过去就该发生的相遇先结算掉（连带被唤醒的流对），只计之后一帧的量
+        for tick in range(engine.frame_count, engine.frame_count + 3):
+            engine.streams.update(tick)
+
+    if case == "step":
+        return time_calls(engine.update_game_logic, reps, reset)
+    if case == "ai":
+        return time_calls(engine.ai.update, reps, reset_ai)
+    if case == "cancel":
+        return time_calls(lambda: engine.projectiles.cancel(10), reps, reset)
+    if case == "cancel_streams":
+        return time_calls(lambda: engine.streams.update(engine.frame_count + 3), reps, reset_streams)
+    if case in ("draw_batched", "draw_legacy"):
+        reset()
+        renderer = make_renderer(case[len("draw_"):], (engine.width, engine.height))
+        hud = [("FPS: 60", (10, 10)), (f"关卡：{engine.level}", (1050, 10))]
+        renderer.draw(engine, hud)  # 第一次整屏画背景，不计
+        return time_calls(lambda: renderer.draw(engine, hud, 0.5), reps)
+    raise ValueError(case)
+
+
+def summarize(times):
+    ms = sorted(t * 1000 for t in times)
+    return {
+        "reps": len(ms),
+        "min_ms": round(ms[0], 4),
+        "median_ms": round(statistics.median(ms), 4),
+        "p90_ms": round(ms[int((len(ms) - 1) * 0.9)], 4),
+        "mean_ms": round(statistics.mean(ms), 4),
+    }
+
+
+def run(scenarios=None, cases=None, reps=50, seed=0):
+    calibration = calibrate()
+    results = {}
+    for name in scenarios or SCENARIOS:
+        engine = build_state(*SCENARIOS[name], seed=seed)
+        data = snapshot(engine)
+        for case in cases or CASES:
+            results[f"{name}/{case}"] = summarize(run_case(engine, data, case, reps))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "processor": platform.processor(),
+            "reps": reps,
+            "seed": seed,
+            "calibration_ms": calibration,
+        },
+        "results": results,
+    }
+
+
+def host_changes(report, baseline):
+    """本次和基线的运行环境有哪些不同：[(项, 基线, 本次)]"""
+    cur, base = report["meta"], baseline["meta"]
+    return [(key, base.get(key), cur.get(key)) for key in HOST_KEYS if base.get(key) != cur.get(key)]
+
+
+def compare(report, baseline, tolerance=0.25):
+    """按中位数对比，返回 [(项, 基线毫秒, 本次毫秒, 比值, 是否变慢)]
+
+    两边都有校准耗时时，比值按各自的校准耗时折算，抵掉机器快慢的差别；旧基线没有就直接比毫秒数
+    """
+    scale = 1.0
+    if baseline["meta"].get("calibration_ms") and report["meta"].get("calibration_ms"):
+        scale = baseline["meta"]["calibration_ms"] / report["meta"]["calibration_ms"]
+    rows = []
+    for key, cur in report["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = cur["median_ms"] * scale / base["median_ms"] if base["median_ms"] else float("inf")
+        rows.append((key, base["median_ms"], cur["median_ms"], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="模拟热点基准")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), help="只跑这些场景")
+    parser.add_argument("--case", nargs="+", choices=CASES, help="只跑这些项")
+    parser.add_argument("--reps", type=int, default=50, help="每项计时次数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="把结果写到 JSON 文件")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE, help="把结果存为基线")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, help="和基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="中位数变慢超过这个比例算退步")
+    args = parser.parse_args(argv)
+
+    report = run(args.scenario, args.case, args.reps, args.seed)
+    for key, r in report["results"].items():
+        print(f"{key:28s} 中位 {r['median_ms']:9.3f}ms  p90 {r['p90_ms']:9.3f}ms  最快 {r['min_ms']:9.3f}ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print("基线已保存：", args.save_baseline)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        print()
+        base_cal, cur_cal = baseline["meta"].get("calibration_ms"), report["meta"]["calibration_ms"]
+        if base_cal:
+            print(f"校准负载 {base_cal:.3f}ms -> {cur_cal:.3f}ms，比值已按它折算")
+        else:
+            print("基线里没有校准耗时，直接比较毫秒数")
+        changes = host_changes(report, baseline)
+        if changes:
+            print("注意：基线不是在同样的环境下录的（" +
+                  "，".join(f"{key} {old} -> {new}" for key, old, new in changes) +
+                  "），比值仅供参考，可以用 --save-baseline 在本机重录")
+        for key, base, cur, ratio, slower in rows:
+            print(f"{key:28s} {base:9.3f}ms -> {cur:9.3f}ms  x{ratio:5.2f}{'  变慢' if slower else ''}")
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""测试共用的小工具
+
+    python -m pytest -q
+"""
+from engine import Engine, Path
+from replay import state_digest
+
+
+def autoplay(seed, mode="grid", camp_count=2):
+    """所有阵营都由 AI 托管的一局"""
+    engine = Engine(seed=seed, camp_count=camp_count)
+    engine.autoplay = True
+    engine.set_cancel_mode(mode)
+    return engine
+
+
+def scripted(engine, frames, rng):
+    """托管对局，另外随机加删路径、到点换关或重开，返回每帧的状态摘要"""
+    digests = []
+    for f in range(frames):
+        n = len(engine.balls)
+        if f % 25 == 0:
+            s, t = rng.randrange(n), rng.randrange(n)
+            if s != t and engine.balls[s].value > 0:
+                engine.paths.add(Path(s, t, "测试", engine.balls[s].camp))
+        if f % 40 == 7 and len(engine.paths):
+            engine.paths.remove(next(iter(engine.paths)))
+        result = engine.update_game_logic()
+        if result == "win" or f % 2500 == 2499:
+            engine.next_level()
+        elif result == "lose":
+            engine.reset()
+        digests.append(state_digest(engine))
+    return digests
@@ -0,0 +1,737 @@
+import heapq
+import math
+import random
+import numpy as np
+from growth import Growth
+from mapgen import MapGenerator, sector
+from projectiles import ProjectileStore
+from streams import StreamCanceller
+
+# 颜色定义
+COLORS = {
+    "RED":    (255, 0, 0),
+    "ORANGE": (255, 165, 0),
+    "YELLOW": (255, 255, 0),
+    "GREEN":  (0, 255, 0),
+    "CYAN":   (0, 255, 255),
+    "BLUE":   (0, 0, 255),
+    "PURPLE": (128, 0, 128),
+    "BLACK":  (0, 0, 0),
+    "WHITE":  (255, 255, 255),
+    "GRAY":   (128, 128, 128)
+}
+
+class Camp:
+    def __init__(self, name, color):
+        self.name = name
+        self.color = color
+
+class Path:
+    def __init__(self, start_idx, end_idx, name, camp):
+        self.start_idx = start_idx
+        self.end_idx = end_idx
+        self.name = name
+        self.camp = camp
+        self.last_shot_frame = 0  # 用帧数代替时间
+
+    @property
+    def key(self):
+        return (self.start_idx, self.end_idx)
+
+class PathRegistry:
+    """按 (起点, 终点) 索引的路径表，查找/添加/删除都是 O(1)，遍历时保持添加顺序"""
+
+    def __init__(self):
+        self._paths = {}
+        self.listener = None  # listener(kind, path)：主动添加/删除路径时通知（录像用）
+        self.version = 0  # 每次增删路径加一，画面据此判断要不要重画路径层
+        self.index = None  # 挂上 pick.PickIndex 后，路径增删会同步过去
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __iter__(self):
+        return iter(self._paths.values())
+
+    def __contains__(self, key):
+        return key in self._paths
+
+    def get(self, start_idx, end_idx):
+        return self._paths.get((start_idx, end_idx))
+
+    def add(self, path):
+        """添加路径；同起点同终点的路径已存在时不添加，返回 False"""
+        if path.key in self._paths:
+            return False
+        self._paths[path.key] = path
+        self.version += 1
+        if self.index is not None:
+            self.index.add_path(path)
+        if self.listener is not None:
+            self.listener("add", path)
+        return True
+
+    def remove(self, path):
+        if self._paths.get(path.key) is path:
+            del self._paths[path.key]
+            self.version += 1
+            if self.index is not None:
+                self.index.remove_path(path)
+            if self.listener is not None:
+                self.listener("remove", path)
+
+    def clear(self):
+        self._paths.clear()
+        self.version += 1
+        if self.index is not None:
+            self.index.clear_paths()
+
+    def load(self, paths):
+        """整体换成给定的路径（恢复快照用），不通知监听者"""
+        self._paths = {path.key: path for path in paths}
+        self.version += 1
+        if self.index is not None:
+            self.index.clear_paths()
+            for path in self._paths.values():
+                self.index.add_path(path)
+
+    def retain(self, keep):
+        """原地删掉 keep(path) 为假的路径"""
+        dead = [key for key, path in self._paths.items() if not keep(path)]
+        for key in dead:
+            path = self._paths.pop(key)
+            if self.index is not None:
+                self.index.remove_path(path)
+        if dead:
+            self.version += 1
+
+class Ball:
+    def __init__(self, pos, camp, value=10, radius=30):
+        self.idx = None  # 在 Engine.balls 里的编号，由 Engine 分配
+        self.camp_index = None  # 挂上 CampIndex 后，阵营/数值变化会同步过去
+        self.pos = list(pos)
+        self._camp = camp
+        self._value = value
+        self.radius = radius
+
+    @property
+    def camp(self):
+        return self._camp
+
+    @camp.setter
+    def camp(self, camp):
+        old_camp = self._camp
+        self._camp = camp
+        if self.camp_index is not None:
+            self.camp_index.update(self, old_camp, self._value)
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        old_value = self._value
+        self._value = value
+        if self.camp_index is not None:
+            self.camp_index.update(self, self._camp, old_value)
+
+class DistanceMatrix:
+    """球心两两距离表，只在球的位置变化（开局、换图）时重建，AI 找最近的球直接查表"""
+
+    def __init__(self, balls):
+        self.version = 0  # 每次重建加一，其他按球位置建的索引据此判断要不要重建
+        self.rebuild(balls)
+
+    def rebuild(self, balls):
+        self.version += 1
+        pos = np.array([b.pos for b in balls], dtype=np.float64).reshape(-1, 2)
+        diff = pos[:, None, :] - pos[None, :, :]
+        self.table = np.sqrt((diff ** 2).sum(axis=2))
+
+    def nearest(self, src, candidates):
+        """candidates 中离 src 最近的球编号，距离相同取排在前面的"""
+        return candidates[int(np.argmin(self.table[src, candidates]))]
+
+    def closest(self, sources, targets):
+        """targets 中离 sources 任意一球最近的球编号，距离相同取排在前面的"""
+        block = self.table[np.ix_(targets, sources)]
+        return targets[int(np.argmin(block)) // len(sources)]
+
+def ball_idx(ball):
+    return ball.idx
+
+class CampIndex:
+    """各阵营存活球（数值>0）的集合和数值总和，球被占领或数值变化时增量更新"""
+
+    def __init__(self, balls):
+        self.rebuild(balls)
+
+    def rebuild(self, balls):
+        self.members = {}
+        self.totals = {}
+        self.alive_count = 0
+        for ball in balls:
+            ball.camp_index = self
+            self.totals[ball.camp] = self.totals.get(ball.camp, 0) + ball.value
+            self.members.setdefault(ball.camp, set())
+            if ball.value > 0:
+                self.members[ball.camp].add(ball)
+                self.alive_count += 1
+
+    def update(self, ball, old_camp, old_value):
+        self.totals[old_camp] -= old_value
+        self.totals[ball.camp] = self.totals.get(ball.camp, 0) + ball.value
+        if old_value > 0:
+            self.members[old_camp].discard(ball)
+            self.alive_count -= 1
+        if ball.value > 0:
+            self.members.setdefault(ball.camp, set()).add(ball)
+            self.alive_count += 1
+
+    def set_values(self, balls, values):
+        """批量改数值，和逐个给 ball.value 赋值结果一样（每秒增长用）"""
+        totals = self.totals
+        for ball, value in zip(balls, values):
+            old_value = ball._value
+            ball._value = value
+            camp = ball._camp
+            totals[camp] += value - old_value
+            if (old_value > 0) != (value > 0):
+                if value > 0:
+                    self.members.setdefault(camp, set()).add(ball)
+                    self.alive_count += 1
+                else:
+                    self.members[camp].discard(ball)
+                    self.alive_count -= 1
+
+    def count(self, camp):
+        return len(self.members.get(camp, ()))
+
+    def total(self, camp):
+        return self.totals.get(camp, 0)
+
+    def balls(self, camp):
+        """该阵营的存活球，按球的编号排序"""
+        return sorted(self.members.get(camp, ()), key=ball_idx)
+
+    def alive_balls(self):
+        alive = [ball for members in self.members.values() for ball in members]
+        return sorted(alive, key=ball_idx)
+
+class AI:
+    def __init__(self, game):
+        self.game = game
+        self.cooldown = 1000  # 每个AI阵营操作冷却时间（毫秒）
+        self.last_action_time = {}
+        self.planner = None  # 设为 planner.Planner 时由前瞻规划代替规则做决策
+        self.manual = frozenset()  # 由外部（联机玩家）操作的阵营，AI 不管；用 set_manual 设置
+        now = self.game.now()
+        # 分别设置每个AI阵营的初始冷却
+        self.init_cooldown = {
+            "黄": 2000,   # 黄阵营初始冷却2秒
+            "紫": 2000,   # 紫阵营初始冷却2秒
+            "青": 2000,   # 青阵营初始冷却4秒
+            # 其它阵营可继续添加
+        }
+        for camp in self.game.camps:
+            if camp != self.game.player_camp and camp is not self.game.gray_camp:
+                delay = self.init_cooldown.get(camp.name, 0)
+                self.last_action_time[camp] = now + delay
+        # 多阵营时把各AI阵营的第一次行动在一个冷却内错开，之后各按各的冷却走，不会挤在同一帧
+        fighting = self.game.fighting_camps
+        if len(fighting) > 2:
+            for i, camp in enumerate(fighting[1:]):
+                self.last_action_time[camp] += i * self.cooldown // (len(fighting) - 1)
+        self.reschedule()
+
+    def reschedule(self):
+        """下一次 update 时按 last_action_time 重排行动队列（外部改了 last_action_time 后调用）"""
+        self.queue = []  # (下次可以行动的时间, 阵营顺序, 阵营)
+        self._key = None
+
+    def set_manual(self, camps):
+        self.manual = frozenset(camps)
+        self.reschedule()
+
+    def _build_queue(self, use_gray):
+        game = self.game
+        if use_gray:
+            ai_camps = [game.gray_camp]
+        else:
+            ai_camps = [camp for camp in game.fighting_camps
+                        if (camp != game.player_camp or game.autoplay) and camp not in self.manual]
+        order = {camp: i for i, camp in enumerate(game.camps)}
+        self.queue = [(self.last_action_time.get(camp, 0) + self.cooldown, order[camp], camp) for camp in ai_camps]
+        heapq.heapify(self.queue)
+
+    def rival(self, camp):
+        """AI眼中的"玩家"：普通AI阵营对付玩家，托管玩家阵营时对付黄阵营；
+        多阵营混战时对付数值总和最大的其它阵营"""
+        game = self.game
+        fighting = game.fighting_camps
+        if len(fighting) > 2 and camp is not game.gray_camp:
+            return max((c for c in fighting if c is not camp), key=game.camp_index.total)
+        if camp != game.player_camp:
+            return game.player_camp
+        return fighting[1]
+
+    def update(self):
+        index = self.game.camp_index
+        dist = self.game.distances
+        balls = self.game.balls
+        gray = self.game.gray_camp
+        # 托管时玩家阵营也由AI操作；AI阵营球数 = 存活球数 - 灰球 - 不托管时的玩家球 - 联机玩家的球
+        ai_count = index.alive_count - index.count(gray)
+        if not self.game.autoplay:
+            ai_count -= index.count(self.game.player_camp)
+        for camp in self.manual:
+            if camp != self.game.player_camp or self.game.autoplay:
+                ai_count -= index.count(camp)
+
+        # 如果AI阵营球已全部消失，且灰色球数量大于玩家球，则AI切换操控灰色
+        use_gray = not ai_count and index.count(gray) > index.count(self.game.player_camp)
+
+        planner = self.planner
+        if planner is not None:
+            planner.poll()
+
+        # 哪些阵营归AI操作只在这几项变化时才变，变了才重排队列；平时每帧只看队首
+        key = (self.game.autoplay, self.game.player_camp, self.game.camp_count, use_gray)
+        if key != self._key:
+            self._key = key
+            self._build_queue(use_gray)
+        now = self.game.now()
+        queue = self.queue
+        if not queue or queue[0][0] > now:
+            return
+        due = []
+        while queue and queue[0][0] <= now:
+            due.append(heapq.heappop(queue))
+        due.sort(key=lambda entry: entry[1])  # 同一帧到期的按阵营顺序行动
+        for _, order, camp in due:
+            heapq.heappush(queue, (now + self.cooldown, order, camp))
+            self.last_action_time[camp] = now
+            if planner is not None and planner.controls(camp):
+                planner.act(camp)
+                continue
+            player_camp = self.rival(camp)
+
+            my_balls = index.balls(camp)
+            all_balls = index.alive_balls()
+            mine = [b.idx for b in my_balls]
+
+            # 新增：如果己方球数字大于49，立刻把多余的发送给最近的球
+            # 新：如果己方球数字大于50，优先向己方低于40且≤50的球传输，否则向数字最小的非己方球进攻
+            for src_ball in my_balls:
+                if src_ball.value < 5:
+                    continue  # 数字小于5时不进行任何操作
+                if src_ball.value > 50:
+                    # 1. 找己方 value < 40 的球
+                    candidates = [b for b in my_balls if b is not src_ball and b.value < 40]
+                    target_ball = None
+                    if candidates:
+                        # 选距离最近的
+                        target_ball = balls[dist.nearest(src_ball.idx, [b.idx for b in candidates])]
+                    else:
+                        # 2. 没有合适己方球，找数字最小的非己方球
+                        enemy_balls = [b for b in all_balls if b.camp != camp and b.value > 0]
+                        if enemy_balls:
+                            target_ball = min(enemy_balls, key=lambda b: b.value)
+                    if target_ball:
+                        src_idx = src_ball.idx
+                        tgt_idx = target_ball.idx
+                        if (src_idx, tgt_idx) not in self.game.paths:
+                            path_name = f"溢出({src_idx+1}->{tgt_idx+1})"
+                            self.game.paths.add(Path(src_idx, tgt_idx, path_name, camp))
+
+            # 新增：己方终点球大于50时切断路径
+            for path in list(self.game.paths):
+                # 只处理己方路径，且终点球为己方且大于50
+                if path.camp == camp:
+                    end_ball = self.game.balls[path.end_idx]
+                    if end_ball.camp == camp and end_ball.value > 50:
+                        self.game.paths.remove(path)
+
+            my_count = len(my_balls)
+            total_balls = len(all_balls)
+            my_total = index.total(camp)
+            player_total = index.total(player_camp)
+
+            # 模式切换
+            mode = "develop"
+            if my_count >= total_balls // 2:
+                mode = "develop2"
+            # 2. 对抗模式：己方球被玩家攻击
+            under_attack = False
+            attacked_ball_idx = None
+            for path in self.game.paths:
+                if path.camp == player_camp and self.game.balls[path.end_idx].camp == camp:
+                    under_attack = True
+                    attacked_ball_idx = path.end_idx
+                    break
+            if under_attack:
+                mode = "fight"
+            # 3. 游击模式：玩家总和大于己方1.5倍
+            if player_total > my_total * 1.5:
+                mode = "guerilla"
+
+            # 发展模式：全力进攻距离最近的非己方球
+            if mode == "develop":
+                if not my_balls:
+                    continue
+                # 找到距离最近的非己方球
+                others = [b.idx for b in all_balls if b.camp != camp and b.value > 0]
+                if not others:
+                    continue
+                target = balls[dist.closest(mine, others)]
+                # 只派一个己方球进攻
+                attacker = balls[dist.nearest(target.idx, mine)]
+                if (attacker.idx, target.idx) not in self.game.paths:
+                    path_name = f"发展({attacker.idx+1}->{target.idx+1})"
+                    self.game.paths.add(Path(attacker.idx, target.idx, path_name, camp))
+                continue
+
+            # 发展模式2：仅当场上有数字小于5的非玩家阵营小球才攻击
+            if mode == "develop2":
+                if not my_balls:
+                    continue
+                target = None
+                for b in all_balls:
+                    if b.camp != camp and b.camp != player_camp and b.value < 5 and b.value > 0:
+                        target = b
+                        break
+                if not target:
+                    continue
+                attacker = balls[dist.nearest(target.idx, mine)]
+                if (attacker.idx, target.idx) not in self.game.paths:
+                    path_name = f"发展2({attacker.idx+1}->{target.idx+1})"
+                    self.game.paths.add(Path(attacker.idx, target.idx, path_name, camp))
+                continue
+
+            # 对抗模式
+            if mode == "fight":
+                if not my_balls:
+                    continue
+                # 被攻击球数字低于20，其他球增援
+                if attacked_ball_idx is not None:
+                    attacked_ball = self.game.balls[attacked_ball_idx]
+                    if attacked_ball.value < 20:
+                        for src in my_balls:
+                            if src.idx != attacked_ball_idx:
+                                if (src.idx, attacked_ball_idx) not in self.game.paths:
+                                    path_name = f"增援({src.idx+1}->{attacked_ball_idx+1})"
+                                    self.game.paths.add(Path(src.idx, attacked_ball_idx, path_name, camp))
+                                    break
+                # 场上有数字小于3的非己方球，最近己方球立刻攻击
+                target = None
+                for b in all_balls:
+                    if b.camp != camp and b.value < 3 and b.value > 0:
+                        target = b
+                        break
+                if not target:
+                    continue
+                attacker = balls[dist.nearest(target.idx, mine)]
+                if (attacker.idx, target.idx) not in self.game.paths:
+                    path_name = f"对抗({attacker.idx+1}->{target.idx+1})"
+                    self.game.paths.add(Path(attacker.idx, target.idx, path_name, camp))
+                continue
+
+            # 游击模式
+            if mode == "guerilla":
+                if not my_balls:
+                    continue
+                # 场上有数字小于3的非己方球，最近己方球立刻攻击
+                target = None
+                for b in all_balls:
+                    if b.camp != camp and b.value < 3 and b.value > 0:
+                        target = b
+                        break
+                if not target:
+                    continue
+                attacker = balls[dist.nearest(target.idx, mine)]
+                if (attacker.idx, target.idx) not in self.game.paths:
+                    path_name = f"游击({attacker.idx+1}->{target.idx+1})"
+                    self.game.paths.add(Path(attacker.idx, target.idx, path_name, camp))
+                # 被攻击球不再增援，被攻击球立刻分散到己方其它未被攻击的球
+                attacked_balls = set()
+                for path in self.game.paths:
+                    if path.camp != camp and self.game.balls[path.end_idx].camp == camp:
+                        attacked_balls.add(path.end_idx)
+                for idx in attacked_balls:
+                    src_ball = self.game.balls[idx]
+                    # 分散到未被攻击的己方球
+                    for dst in my_balls:
+                        dst_idx = dst.idx
+                        if dst_idx not in attacked_balls and dst_idx != idx:
+                            if (idx, dst_idx) not in self.game.paths:
+                                path_name = f"分散({idx+1}->{dst_idx+1})"
+                                self.game.paths.add(Path(idx, dst_idx, path_name, camp))
+                                break
+                continue
+
+class Engine:
+    """对局规则本体（球、路径、小球、增长、AI、胜负），不依赖 pygame
+
+    now: 返回当前毫秒数的函数。不传时按帧计时（每帧 1000/60 毫秒），
+    这样无界面批量跑的时候可以远快于真实时间。
+    seed: 随机种子，同一种子 + 同样的操作得到同样的对局；不传时随机挑一个并记在 self.seed。
+    camp_count: 参战阵营数（不含灰色），2 为蓝黄对战，最多 7 个阵营混战；玩家总是蓝色。
+    layout: 为 False 时不生成地图、没有球，给 snapshot.fork 这种马上要恢复快照的场合用。
+    width, height: 场地大小（像素）；camp_balls: 每个参战阵营开局几个球；gray_count: 开局几个灰球。
+    都是默认值时两阵营开局用原来固定的位置，否则开局也由地图生成器摆放，可以做几百个球的大地图。
+    """
+
+    fps = 60
+
+    def __init__(self, now=None, seed=None, camp_count=2, layout=True, width=1200, height=600,
+                 camp_balls=4, gray_count=9):
+        self.now = now or self.frame_ticks
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.rng = random.Random(self.seed)
+        self.recorder = None  # 录像时由 replay.Recorder 挂上
+        self.profiler = None  # 挂上 profiler.Profiler 时分段计时
+        self.frame_count = 0
+        self.path_count = 1
+        self.cooldown_frames = 50 #基础发射间隔
+        self.shoot_speed_factor = 0.05  # 调整发射速度调节系数，数字越大，间隔缩短越快
+        self.cancel_interval = 10  # 相遇抵消检测间隔帧数，设为1则每帧检测（不会互相穿过）
+        self.paths = PathRegistry()
+        self.camp_count = camp_count
+        self.width = width
+        self.height = height
+        self.camp_balls = camp_balls
+        self.gray_count = gray_count
+        self.init_camps_and_balls(layout)
+        self.camp_index = CampIndex(self.balls)
+        self.distances = DistanceMatrix(self.balls)
+        self.projectiles = ProjectileStore(self.camps)
+        # "grid"：每隔 cancel_interval 帧按距离找相遇的小球；"streams"：按路径对解析计算，见 streams.py
+        self.cancel_mode = "grid"
+        self.streams = StreamCanceller(self)
+        now_tick = self.now()
+        # 每秒增长的计时、概率和随机数，见 growth.py
+        self.growth = Growth(len(self.balls), now_tick, self.seed)
+        self.last_ai_add_time = None  # 第一次更新时再开始计时
+        self.player_camp = self.camps[0]  # 蓝色为玩家阵营
+        self.ai = AI(self)  # 独立AI模块
+        self.level = 0
+        self.ai_enabled = True
+        self.autoplay = False  # 为True时玩家阵营也交给AI（无人值守批量对局用）
+        self.grow_max = 100  # 增长上限
+
+    def frame_ticks(self):
+        return self.frame_count * 1000 // self.fps
+
+    @property
+    def gray_camp(self):
+        return self.camps[2]
+
+    @property
+    def fighting_camps(self):
+        """参战阵营，按 camps 的顺序（玩家蓝色在第一个）"""
+        return [camp for camp in self.camps if camp is not self.gray_camp][:self.camp_count]
+
+    def slot_camp(self, i):
+        """开局、重置、换关时第 i 个球归哪个阵营：参战阵营每家 camp_balls 个，其余为灰"""
+        if i < self.camp_balls * self.camp_count:
+            return self.fighting_camps[i // self.camp_balls]
+        return self.gray_camp
+
+    def camp_groups(self):
+        """地图生成器里各参战阵营的 (球数, 密度分布)：两阵营左右分开，多阵营绕中心分扇区"""
+        k, n = self.camp_balls, self.camp_count
+        if n == 2:
+            # 蓝球左半区越靠左越密，黄球右半区越靠右越密
+            return [(k, "left"), (k, "right")]
+        return [(k, sector(i, n)) for i in range(n)]
+
+    def init_camps_and_balls(self, layout=True):
+        self.camps = [
+            Camp("蓝", COLORS["BLUE"]),
+            Camp("黄", COLORS["YELLOW"]),
+            Camp("灰", COLORS["GRAY"]),
+            Camp("紫", COLORS["PURPLE"]),
+            Camp("青", COLORS["CYAN"]),
+            Camp("绿", COLORS["GREEN"]),
+            Camp("橙", COLORS["ORANGE"]),
+            Camp("红", COLORS["RED"]),
+            # 可在此添加更多阵营
+        ]
+        if not 2 <= self.camp_count < len(self.camps):
+            raise ValueError(f"参战阵营数应在 2 到 {len(self.camps) - 1} 之间")
+        if not layout:
+            self.balls = []
+            return
+        if self.camp_count == 2 and (self.width, self.height, self.camp_balls) == (1200, 600, 4):
+            positions = [
+                (100, 100), (200, 100), (100, 200), (200, 200),           # 蓝球
+                (1100, 500), (1000, 500), (1100, 400), (1000, 400)        # 黄球
+            ]
+        else:
+            # 多阵营：绕场地中心各占一个扇区，蓝色在左
+            gen = MapGenerator(self.width, self.height, radius=30, margin=10, edge=30)
+            positions = gen.generate(self.rng, self.camp_groups())
+        self.balls = []
+        for i, pos in enumerate(positions):
+            self.balls.append(Ball(pos, self.slot_camp(i)))
+        
+        # 随机添加 gray_count 个灰球，不与已有球重叠
+        gray_camp = self.gray_camp
+        gen = MapGenerator(self.width, self.height, radius=30, margin=0, edge=30)
+        for pos in gen.generate(self.rng, [(self.gray_count, "uniform")], fixed=positions):
+            self.balls.append(Ball(pos, gray_camp, value=5))  # 这里将value设为5
+        for i, ball in enumerate(self.balls):
+            ball.idx = i
+
+    def set_cancel_mode(self, mode):
+        if mode not in ("grid", "streams"):
+            raise ValueError(mode)
+        if self.recorder is not None:
+            self.recorder.on_cancel_mode(mode)
+        self.cancel_mode = mode
+        if mode == "streams":
+            self.streams.rebuild()
+
+    def reset(self):
+        if self.recorder is not None:
+            self.recorder.on_reset()
+        for i, ball in enumerate(self.balls):
+            # 前 camp_balls 个为蓝，之后每个AI阵营 camp_balls 个，其余为灰
+            ball.camp = self.slot_camp(i)
+            if i < self.camp_balls:
+                ball.value = 10
+            elif ball.camp is not self.gray_camp:
+                ball.value = int(3 + self.level//5)  # AI阵营初始数字受level影响
+            else:
+                ball.value = 5
+        self.paths.clear()
+        self.projectiles.clear()
+        self.streams.clear()
+        self.path_count = 1
+
+    def update_game_logic(self):
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+        if self.ai_enabled:
+            self.ai.update()
+        if prof is not None:
+            prof.lap("ai")
+        if self.cancel_mode == "streams":
+            self.streams.update(self.frame_count)
+            if prof is not None:
+                prof.lap("cancel")
+        # 结算这一帧到达的小球（发射时已排好到达帧）
+        self.projectiles.step(self.balls, self.frame_count)
+        if prof is not None:
+            prof.lap("arrival")
+
+        # 清除起点球为0的路径
+        balls = self.balls
+        self.paths.retain(lambda p: balls[p.start_idx].value > 0 and balls[p.start_idx].camp == p.camp)
+
+        # 发射小球（按帧数判断）
+        for path in self.paths:
+            s_ball = self.balls[path.start_idx]
+            e_ball = self.balls[path.end_idx]
+            # 动态发射间隔，数字越大间隔越短，最小为2帧
+            dynamic_cooldown = max(2, int(self.cooldown_frames / (1 + s_ball.value * self.shoot_speed_factor)))  # self.shoot_speed_factor为调节系数
+            if s_ball.value > 0 and self.frame_count - path.last_shot_frame >= dynamic_cooldown:
+                angle = math.atan2(e_ball.pos[1] - s_ball.pos[1], e_ball.pos[0] - s_ball.pos[0])
+                ball_speed = 1  # 不变
+                velocity = [math.cos(angle) * ball_speed, math.sin(angle) * ball_speed]
+                uid = self.projectiles.spawn(s_ball.pos, velocity, e_ball, s_ball.camp)
+                if self.cancel_mode == "streams":
+                    self.streams.launch(path.start_idx, path.end_idx, s_ball.camp, velocity, uid, self.frame_count)
+                s_ball.value -= 1
+                path.last_shot_frame = self.frame_count
+
+        if prof is not None:
+            prof.lap("fire")
+
+        # 检查不同阵营小球相遇抵消
+        self.frame_count += 1
+        if self.cancel_mode == "grid" and self.frame_count % self.cancel_interval == 0:
+            self.projectiles.cancel(10)
+        if prof is not None:
+            prof.lap("cancel")
+
+        # 概率机制（全部用tick计时，单位毫秒）
+        now_tick = self.now()
+        if self.last_ai_add_time is None:
+            self.last_ai_add_time = now_tick
+        if now_tick - self.last_ai_add_time >= 1000:
+            self.last_ai_add_time = now_tick
+            # AI阵营额外增长 level//10
+            ai_camps = set(self.fighting_camps)
+            ai_camps.discard(self.player_camp)
+            self.growth.step(self.balls, self.camp_index, now_tick, ai_camps, self.level // 10, self.grow_max)
+        if prof is not None:
+            prof.lap("growth")
+
+        result = self.check_result()
+        if prof is not None:
+            prof.lap("check")
+            prof.commit(self)
+        return result
+
+    def check_result(self):
+        """胜负判定：返回 "lose"、"win"，未分胜负返回 None"""
+        alive_count = self.camp_index.alive_count
+        if alive_count:
+            player_count = self.camp_index.count(self.player_camp)
+            if player_count == 0:
+                return "lose"
+            elif player_count == alive_count:
+                return "win"
+        return None
+
+    def conclude(self, result):
+        """分出胜负后直接开下一局：赢了进下一关，输了重置（不经过结算画面，无界面批量、服务端用）"""
+        if result == "win":
+            self.next_level()
+        elif result == "lose":
+            self.reset()
+
+    def play(self, max_frames=60 * 60 * 10):
+        """无界面连续推进，直到分出胜负或达到帧数上限"""
+        for _ in range(max_frames):
+            result = self.update_game_logic()
+            if result is not None:
+                return result
+        return None
+
+    def next_level(self):
+        if self.recorder is not None:
+            self.recorder.on_next_level()
+        self.level += 1
+        self.randomize_balls()
+
+    def randomize_balls(self):
+        radius = 30
+        margin = 10  # 球之间最小间距，可调
+        edge = 100   # 边缘留白
+        n = self.camp_count
+        if n > 2:
+            # 多阵营每个扇区都要放下 camp_balls 个球，边缘留白和开局一样只留 30，否则窄的扇区放不下
+            edge = 30
+        gen = MapGenerator(self.width, self.height, radius, margin, edge)
+        # 灰球全场均匀
+        gray_count = len(self.balls) - self.camp_balls * n
+        positions = gen.generate(self.rng, self.camp_groups() + [(gray_count, "uniform")])
+        # 重新分配位置和阵营
+        for i, ball in enumerate(self.balls):
+            ball.pos = list(positions[i])
+            ball.camp = self.slot_camp(i)
+            if i < self.camp_balls:
+                ball.value = 10
+            elif ball.camp is not self.gray_camp:
+                ball.value = int(10 + self.level)
+            else:
+                ball.value = 5
+        self.distances.rebuild(self.balls)
+        self.paths.clear()
+        self.projectiles.clear()
+        self.streams.clear()
+        self.path_count = 1
@@ -0,0 +1,367 @@
+"""训练用的环境接口：reset/step 的签名和 gymnasium.Env 一样，但不依赖 gymnasium
+
+智能体控制蓝色阵营，其余阵营由内置 AI（或前瞻规划 AI）操作；每一步先执行一个动作，再推进 frame_skip 帧。
+
+观测（球按编号排，n 为球数，整局不变）
+    pos    (n, 2) float32  球心坐标（像素）
+    value  (n,)   int32    数值
+    camp   (n,)   int8     阵营编号，即 engine.camps 的下标（0 蓝为自己，2 灰）
+    paths  (n, n) uint8    paths[a, b] = 1 表示有 a->b 的路径（路径总是属于起点球的阵营）
+动作：一个整数，0 不动，其余为新建或删除一条路径，用 encode_action / decode_action 换算
+奖励：己方得分（planner.score）的变化量 / reward_scale，赢了再 +1，输了再 -1
+
+    env = BeesEnv(seed=0)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(env.encode_action(ADD, 0, 9))
+
+VectorEnv 一次推进多个独立的环境，workers > 0 时分到子进程里跑，观测直接写进共享内存：
+
+    python env.py --envs 64 --workers 4 --steps 200
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from engine import Engine, Path
+from planner import Planner, score
+
+NOOP, ADD, REMOVE = 0, 1, 2
+
+
+def observation_spec(n_balls):
+    """观测各项的 (形状, 类型)"""
+    return {
+        "pos": ((n_balls, 2), np.float32),
+        "value": ((n_balls,), np.int32),
+        "camp": ((n_balls,), np.int8),
+        "paths": ((n_balls, n_balls), np.uint8),
+    }
+
+
+class BeesEnv:
+    """camp_count: 参战阵营数；frame_skip: 每一步推进几帧（AI 每个阵营 1 秒操作一次，即 60 帧）
+    max_steps: 超过这么多步算截断；level: 开局关卡，reset 的 options={"level": ...} 可以单独指定
+    opponent: "ai" 为规则 AI，"planner" 为前瞻规划 AI（不限时，结果可复现，但慢），None 为对手不动
+    """
+
+    def __init__(self, camp_count=2, frame_skip=30, max_steps=1200, level=0, opponent="ai",
+                 cancel_mode="grid", reward_scale=100, seed=None):
+        if opponent not in ("ai", "planner", None):
+            raise ValueError(opponent)
+        self.camp_count = camp_count
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.level = level
+        self.opponent = opponent
+        self.cancel_mode = cancel_mode
+        self.reward_scale = reward_scale
+        self.rng = random.Random(seed)
+        self.engine = None
+        self.new_engine(self.rng.randrange(2 ** 63), level)
+        self.n_balls = len(self.engine.balls)
+        self.action_count = 1 + 2 * self.n_balls * self.n_balls
+        self.observation_spec = observation_spec(self.n_balls)
+        self.steps = 0
+        self.last_score = 0
+
+    def new_engine(self, seed, level):
+        self.close()
+        engine = Engine(seed=seed, camp_count=self.camp_count)
+        engine.set_cancel_mode(self.cancel_mode)
+        if level:
+            engine.level = level
+            engine.randomize_balls()
+        if self.opponent is None:
+            engine.ai_enabled = False
+        elif self.opponent == "planner":
+            engine.ai.planner = Planner(engine, budget_ms=None, rollouts=2)
+        self.engine = engine
+        self.camp = engine.player_camp
+
+    def encode_action(self, kind, a=0, b=0):
+        if kind == NOOP:
+            return 0
+        n = self.n_balls
+        return 1 + ((kind - ADD) * n + a) * n + b
+
+    def decode_action(self, action):
+        """整数动作换成 (种类, 起点, 终点)"""
+        if action == 0:
+            return NOOP, 0, 0
+        n = self.n_balls
+        rest, b = divmod(int(action) - 1, n)
+        kind, a = divmod(rest, n)
+        return kind + ADD, a, b
+
+    def apply(self, action):
+        """执行动作，和鼠标连线、划线删除的规则一样：只能从己方的球连线、只能删己方的路径；
+        不合法时什么也不做，返回 False"""
+        kind, a, b = self.decode_action(action)
+        if kind == NOOP:
+            return True
+        engine = self.engine
+        if not 0 <= a < self.n_balls or not 0 <= b < self.n_balls or a == b:
+            return False
+        if kind == ADD:
+            start = engine.balls[a]
+            if start.camp is not self.camp or (a, b) in engine.paths:
+                return False
+            engine.paths.add(Path(a, b, f"路径{engine.path_count}({a+1}->{b+1})", self.camp))
+            engine.path_count += 1
+            return True
+        path = engine.paths.get(a, b)
+        if kind != REMOVE or path is None or path.camp is not self.camp:
+            return False
+        engine.paths.remove(path)
+        return True
+
+    def observe(self, out=None):
+        """当前观测；给了 out（各项形状对得上的数组）就直接写进去"""
+        if out is None:
+            out = {key: np.zeros(shape, dtype) for key, (shape, dtype) in self.observation_spec.items()}
+        engine = self.engine
+        camp_ids = engine.projectiles.camp_ids
+        balls = engine.balls
+        out["pos"][:] = [ball.pos for ball in balls]
+        out["value"][:] = [ball.value for ball in balls]
+        out["camp"][:] = [camp_ids[ball.camp] for ball in balls]
+        paths = out["paths"]
+        paths.fill(0)
+        for path in engine.paths:
+            paths[path.start_idx, path.end_idx] = 1
+        return out
+
+    def info(self, result=None, valid=True):
+        engine = self.engine
+        return {"level": engine.level, "frame": engine.frame_count, "result": result, "valid": valid}
+
+    def reset(self, seed=None, options=None, out=None):
+        """新开一局，返回 (观测, info)；seed 为 None 时接着用环境自己的随机数挑种子"""
+        if seed is not None:
+            self.rng.seed(seed)
+        level = (options or {}).get("level", self.level)
+        self.new_engine(self.rng.randrange(2 ** 63), level)
+        self.steps = 0
+        self.last_score = score(self.engine, self.camp)
+        return self.observe(out), self.info()
+
+    def step(self, action, out=None):
+        """返回 (观测, 奖励, 是否分出胜负, 是否到步数上限, info)"""
+        valid = self.apply(action)
+        engine = self.engine
+        result = None
+        for _ in range(self.frame_skip):
+            result = engine.update_game_logic()
+            if result is not None:
+                break
+        self.steps += 1
+        now = score(engine, self.camp)
+        reward = (now - self.last_score) / self.reward_scale
+        self.last_score = now
+        if result == "win":
+            reward += 1.0
+        elif result == "lose":
+            reward -= 1.0
+        terminated = result is not None
+        truncated = not terminated and self.steps >= self.max_steps
+        return self.observe(out), reward, terminated, truncated, self.info(result, valid)
+
+    def close(self):
+        if self.engine is not None and self.engine.ai.planner is not None:
+            self.engine.ai.planner.close()
+
+
+def step_block(envs, buffers, rows, actions):
+    """推进一组环境，观测写进 buffers 的对应行；结束的环境自动 reset，
+    结束时的观测放在 info["final_observation"]"""
+    rewards, terminated, truncated, infos = [], [], [], []
+    for env, row, action in zip(envs, rows, actions):
+        out = {key: buf[row] for key, buf in buffers.items()}
+        _, reward, term, trunc, info = env.step(action, out)
+        if term or trunc:
+            info["final_observation"] = {key: value.copy() for key, value in out.items()}
+            env.reset(out=out)
+        rewards.append(reward)
+        terminated.append(term)
+        truncated.append(trunc)
+        infos.append(info)
+    return rewards, terminated, truncated, infos
+
+
+def reset_block(envs, buffers, rows, seeds):
+    infos = []
+    for env, row, seed in zip(envs, rows, seeds):
+        _, info = env.reset(seed, out={key: buf[row] for key, buf in buffers.items()})
+        infos.append(info)
+    return infos
+
+
+def attach_buffers(spec, n_envs, shm):
+    """在一块共享内存上按 spec 切出各项观测数组，第一维为环境编号"""
+    buffers = {}
+    offset = 0
+    for key, (shape, dtype) in spec.items():
+        arr = np.ndarray((n_envs,) + shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        buffers[key] = arr
+        offset += arr.nbytes
+    return buffers
+
+
+def buffers_size(spec, n_envs):
+    return sum(n_envs * int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in spec.values())
+
+
+def worker(conn, shm, spec, n_envs, rows, env_kwargs):
+    """子进程：负责 rows 这几个环境，按主进程发来的命令 reset/step"""
+    buffers = attach_buffers(spec, n_envs, shm)
+    envs = [BeesEnv(**kwargs) for kwargs in env_kwargs]
+    try:
+        while True:
+            cmd, data = conn.recv()
+            if cmd == "step":
+                conn.send(step_block(envs, buffers, rows, data))
+            elif cmd == "reset":
+                conn.send(reset_block(envs, buffers, rows, data))
+            else:
+                break
+    finally:
+        for env in envs:
+            env.close()
+        del buffers
+        shm.close()
+        conn.close()
+
+
+class VectorEnv:
+    """n_envs 个独立的 BeesEnv，一次 step 全部推进一步，结束的自动 reset
+
+    workers: 0 时在本进程里依次推进；大于 0 时分给这么多个子进程，观测写在共享内存里，不经过管道
+    seed: 第 i 个环境的种子为 seed + i；其余参数原样传给 BeesEnv
+    reset/step 返回的观测是各项第一维为环境编号的数组，下一次 step 会原地覆盖，要留着请 copy
+    """
+
+    def __init__(self, n_envs, workers=0, seed=None, **env_kwargs):
+        self.n_envs = n_envs
+        base = seed if seed is not None else random.randrange(2 ** 31)
+        kwargs = [dict(env_kwargs, seed=base + i) for i in range(n_envs)]
+        probe = BeesEnv(**kwargs[0])
+        self.n_balls = probe.n_balls
+        self.action_count = probe.action_count
+        self.observation_spec = probe.observation_spec
+        self.encode_action = probe.encode_action
+        self.decode_action = probe.decode_action
+        self.shm = None
+        self.procs = []
+        self.conns = []
+        if workers <= 0:
+            self.envs = [probe] + [BeesEnv(**kw) for kw in kwargs[1:]]
+            self.buffers = {key: np.zeros((n_envs,) + shape, dtype)
+                            for key, (shape, dtype) in self.observation_spec.items()}
+            return
+        probe.close()
+        self.envs = None
+        self.shm = SharedMemory(create=True, size=buffers_size(self.observation_spec, n_envs))
+        self.buffers = attach_buffers(self.observation_spec, n_envs, self.shm)
+        workers = min(workers, n_envs)
+        for w in range(workers):
+            rows = list(range(w * n_envs // workers, (w + 1) * n_envs // workers))
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=worker, args=(child, self.shm, self.observation_spec, n_envs, rows,
+                                     [kwargs[i] for i in rows]), daemon=True)
+            proc.start()
+            child.close()
+            self.procs.append((proc, rows))
+            self.conns.append(parent)
+
+    def _run(self, cmd, per_env):
+        """per_env 按环境编号排的参数；返回按环境编号排好的各子进程结果"""
+        if self.envs is not None:
+            rows = list(range(self.n_envs))
+            block = step_block if cmd == "step" else reset_block
+            return block(self.envs, self.buffers, rows, per_env)
+        for conn, (_, rows) in zip(self.conns, self.procs):
+            conn.send((cmd, [per_env[i] for i in rows]))
+        parts = [conn.recv() for conn in self.conns]
+        if cmd == "reset":
+            return [info for part in parts for info in part]
+        return tuple([x for part in parts for x in part[k]] for k in range(4))
+
+    def reset(self, seed=None):
+        seeds = [None] * self.n_envs if seed is None else [seed + i for i in range(self.n_envs)]
+        infos = self._run("reset", seeds)
+        return self.buffers, infos
+
+    def step(self, actions):
+        """actions: 每个环境一个整数动作；返回 (观测, 奖励, 分出胜负, 截断, info 列表)"""
+        rewards, terminated, truncated, infos = self._run("step", [int(a) for a in actions])
+        return (self.buffers, np.array(rewards, dtype=np.float32),
+                np.array(terminated, dtype=bool), np.array(truncated, dtype=bool), infos)
+
+    def close(self):
+        if self.envs is not None:
+            for env in self.envs:
+                env.close()
+            self.envs = None
+            return
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc, _ in self.procs:
+            proc.join()
+        self.procs = []
+        self.conns = []
+        self.buffers = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+def random_actions(vec, obs, rng):
+    """自测用的随机策略：一半不动，一半从随机一个己方球连到随机一个球"""
+    actions = []
+    for camps in obs["camp"]:
+        own = np.flatnonzero(camps == 0)
+        if len(own) and rng.random() < 0.5:
+            a = int(rng.choice(own))
+            b = int(rng.integers(vec.n_balls - 1))
+            actions.append(vec.encode_action(ADD, a, b + (b >= a)))
+        else:
+            actions.append(0)
+    return actions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="随机策略对内置 AI，测环境吞吐")
+    parser.add_argument("--envs", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0, help="子进程数，0 为本进程内")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--frame-skip", type=int, default=30)
+    parser.add_argument("--camps", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    vec = VectorEnv(args.envs, args.workers, seed=args.seed, camp_count=args.camps, frame_skip=args.frame_skip)
+    rng = np.random.default_rng(args.seed)
+    obs, _ = vec.reset()
+    done = wins = 0
+    t = time.perf_counter()
+    for _ in range(args.steps):
+        obs, rewards, terminated, truncated, infos = vec.step(random_actions(vec, obs, rng))
+        done += int(terminated.sum() + truncated.sum())
+        wins += sum(info["result"] == "win" for info in infos)
+    elapsed = time.perf_counter() - t
+    vec.close()
+    steps = args.envs * args.steps
+    print(f"{steps} 步（{steps * args.frame_skip} 帧）用时 {elapsed:.2f} 秒，"
+          f"{steps / elapsed:.0f} 步/秒；结束 {done} 局，其中赢 {wins} 局")
+
+
+if __name__ == "__main__":
+    main()
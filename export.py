@@ -0,0 +1,179 @@
+"""离屏导出对局画面：按选定的帧率把画面画到 pygame.Surface 上，交给进程池并行编码成 PNG 序列
+
+不需要显示器（用 SDL 的 dummy 驱动），来源可以是录像，也可以是现跑的无界面对局。
+主进程只负责模拟和绘制，编码在进程池里做；积压的帧超过 max_pending 时才会等。
+
+    python export.py --replay match.bees --out frames --fps 15
+    python export.py --seed 3 --frames 3600 --out frames --thumbnail thumb.png
+    ffmpeg -framerate 15 -i frames/frame_%06d.png clip.mp4      # 需要视频时再自己合成
+"""
+import argparse
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from engine import Engine
+from render import Renderer, load_font
+from replay import Replay, ReplayPlayer
+
+
+def encode_png(data, size, level=1):
+    """RGB 字节编码成 PNG；pygame.image.save 固定用较慢的压缩等级，批量导出时编码是大头"""
+    w, h = size
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(h, w * 3)
+    raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), rows]).tobytes()  # 每行前面是过滤方式 0
+
+    def chunk(tag, body):
+        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, level))
+            + chunk(b"IEND", b""))
+
+
+def save_png(path, size, data, level=1):
+    """进程池里执行：RGB 字节编码成 PNG 写到 path"""
+    with open(path, "wb") as f:
+        f.write(encode_png(data, size, level))
+    return path
+
+
+class FrameExporter:
+    """out_dir: PNG 序列目录，文件名为 frame_000000.png 起连续编号
+    workers: 编码进程数，默认等于 CPU 核数；max_pending: 最多有多少帧在排队编码
+    level: PNG 的 zlib 压缩等级，1 最快，9 文件最小
+    """
+
+    def __init__(self, out_dir, workers=None, max_pending=32, size=(1200, 600), prefix="frame", level=1):
+        pygame.font.init()
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.surface = pygame.Surface(size)
+        self.renderer = Renderer(self.surface, load_font(24))
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.level = level
+        self.pending = deque()
+        self.count = 0
+        self.wait_seconds = 0.0  # 因为编码跟不上，主进程等了多久
+
+    def capture(self, engine, hud=None):
+        """画当前这一帧并交给进程池，返回文件路径"""
+        if hud is None:
+            hud = [(f"第{engine.frame_count}帧", (10, 10)), (f"关卡：{engine.level}", (1050, 10))]
+        self.renderer.draw(engine, hud)
+        self.renderer.finish()
+        path = os.path.join(self.out_dir, f"{self.prefix}_{self.count:06d}.png")
+        self.count += 1
+        self._submit(path, self.surface)
+        return path
+
+    def thumbnail(self, path, size=(320, 160)):
+        """把最近画的一帧缩小存成缩略图"""
+        self._submit(path, pygame.transform.smoothscale(self.surface, size))
+
+    def _submit(self, path, surface):
+        while len(self.pending) >= self.max_pending:
+            start = time.perf_counter()
+            self.pending.popleft().result()
+            self.wait_seconds += time.perf_counter() - start
+        data = pygame.image.tobytes(surface, "RGB")
+        self.pending.append(self.pool.submit(save_png, path, surface.get_size(), data, self.level))
+
+    def close(self):
+        """等所有帧写完；编码出错时在这里抛出"""
+        try:
+            while self.pending:
+                self.pending.popleft().result()
+        finally:
+            self.pool.shutdown()
+
+
+def export_frames(engine, advance, exporter, fps=15, start=0, end=None, thumbnail=None):
+    """从 engine 当前帧推进到 end（不含），start 之后每隔 60/fps 帧导出一张；返回导出的张数
+
+    advance() 推进一帧，返回 update_game_logic 的结果；返回胜负时停下，最后一帧总会导出。
+    """
+    every = max(1, round(engine.fps / fps))
+    exported = 0
+    result = None
+    while end is None or engine.frame_count < end:
+        if engine.frame_count >= start and (engine.frame_count - start) % every == 0:
+            exporter.capture(engine)
+            exported += 1
+        result = advance()
+        if result is not None:
+            break
+    if result is not None or exported == 0:
+        exporter.capture(engine)
+        exported += 1
+    if thumbnail:
+        exporter.thumbnail(thumbnail)
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离屏导出对局画面为 PNG 序列")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--replay", help="从录像导出")
+    source.add_argument("--seed", type=int, help="现跑一局无界面对局（托管双方）导出")
+    parser.add_argument("--out", required=True, help="PNG 序列目录")
+    parser.add_argument("--fps", type=float, default=15, help="导出帧率（逻辑为每秒60帧）")
+    parser.add_argument("--start", type=int, default=0, help="从第几帧开始导出")
+    parser.add_argument("--end", type=int, help="导出到第几帧（不含），默认到录像结尾或分出胜负")
+    parser.add_argument("--frames", type=int, default=60 * 60, help="现跑对局时最多跑多少帧")
+    parser.add_argument("--level", type=int, default=0, help="现跑对局的关卡")
+    parser.add_argument("--camps", type=int, default=2, help="现跑对局的参战阵营数")
+    parser.add_argument("--width", type=int, default=1200, help="现跑对局的场地宽（像素）")
+    parser.add_argument("--height", type=int, default=600, help="现跑对局的场地高（像素）")
+    parser.add_argument("--camp-balls", type=int, default=4, help="现跑对局每个阵营开局几个球")
+    parser.add_argument("--gray-balls", type=int, default=9, help="现跑对局开局几个灰球")
+    parser.add_argument("--thumbnail", help="最后一帧的缩略图路径")
+    parser.add_argument("--workers", type=int, default=None, help="编码进程数")
+    parser.add_argument("--png-level", type=int, default=1, help="PNG 压缩等级 0-9")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        player = ReplayPlayer(replay, keyframe_interval=10 ** 9)  # 只往前跑，不存快照
+        engine = player.seek(args.start)
+
+        def advance():
+            player.step()  # 录像里胜负之后还有换关/重开，一直放到结尾
+
+        end = args.end if args.end is not None else replay.last_tick
+    else:
+        engine = Engine(seed=args.seed, camp_count=args.camps, width=args.width, height=args.height,
+                        camp_balls=args.camp_balls, gray_count=args.gray_balls)
+        engine.autoplay = True
+        if args.level:
+            engine.level = args.level
+            engine.randomize_balls()
+        advance = engine.update_game_logic
+        end = args.end if args.end is not None else args.frames
+
+    exporter = FrameExporter(args.out, args.workers, size=(engine.width, engine.height), level=args.png_level)
+    first = engine.frame_count
+    t = time.perf_counter()
+    count = export_frames(engine, advance, exporter, args.fps, args.start, end, args.thumbnail)
+    sim = time.perf_counter() - t
+    exporter.close()
+    total = time.perf_counter() - t
+    seconds = (engine.frame_count - first) / engine.fps
+    print(f"导出 {count} 张，对局 {seconds:.1f} 秒，模拟+绘制 {sim:.1f} 秒，含编码共 {total:.1f} 秒"
+          f"（{seconds / total:.1f} 倍速），等编码 {exporter.wait_seconds:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
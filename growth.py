@@ -0,0 +1,72 @@
+"""每秒一次的数值增长，按球编号把计时和概率存成数组，一次算完所有球
+
+规则（每个球独立）：
+    AI阵营存活的球先加 level//10
+    数值达到上限 grow_max 不再增长
+    超过上限一半时 30% 概率 +1
+    否则 50% 概率 +1，再有 add10_prob 的概率 +10；
+    add10_prob 平时为 0.0063，距上次 +10 超过 10 秒后每多 1 秒加 0.005
+
+随机数来自独立的 numpy 生成器（PCG64，用对局种子初始化），每次增长一次取一批，
+和球的个数无关地只调用一次；生成器状态随快照保存。
+"""
+import numpy as np
+
+ADD10_BASE = 0.0063
+ADD10_STEP = 0.005
+ADD10_AFTER = 10000  # 毫秒
+
+
+class Growth:
+    def __init__(self, n, now_tick, seed):
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+        self.reset(n, now_tick)
+
+    def reset(self, n, now_tick):
+        self.last_add10_time = np.full(n, now_tick, dtype=np.int64)
+        self.add10_prob = np.full(n, 0.0163)
+
+    def seed(self, seed):
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+
+    def get_rng_state(self):
+        """(state, inc, has_uint32, uinteger)，state 和 inc 为 128 位整数"""
+        st = self.rng.bit_generator.state
+        return st["state"]["state"], st["state"]["inc"], st["has_uint32"], st["uinteger"]
+
+    def set_rng_state(self, state, inc, has_uint32, uinteger):
+        self.rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {"state": state, "inc": inc},
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+
+    def step(self, balls, index, now_tick, bonus_camps, bonus, grow_max):
+        """增长一次：bonus_camps 里存活的球先加 bonus，再按上面的规则增长；
+        数值变了的球通过 CampIndex.set_values 一起写回"""
+        n = len(balls)
+        old = np.fromiter((b._value for b in balls), dtype=np.int64, count=n)
+        values = old.copy()
+        if bonus:
+            ai = np.fromiter((b._camp in bonus_camps for b in balls), dtype=bool, count=n)
+            values += (ai & (old > 0)) * bonus
+        r = self.rng.random(n)
+        capped = values >= grow_max
+        high = ~capped & (values > grow_max // 2)
+        low = ~capped & ~high
+
+        over = now_tick - self.last_add10_time
+        prob = np.where(over >= ADD10_AFTER,
+                        np.minimum(ADD10_BASE + ADD10_STEP * ((over - ADD10_AFTER) // 1000), 1.0),
+                        ADD10_BASE)
+        self.add10_prob[low] = prob[low]
+        plus1 = (high & (r < 0.3)) | (low & (r < 0.5))
+        plus10 = low & (r >= 0.5) & (r < 0.5 + prob)
+        self.last_add10_time[plus10] = now_tick
+        self.add10_prob[plus10] = ADD10_BASE
+        values += plus1
+        values += plus10 * 10
+
+        changed = np.flatnonzero(values != old)
+        index.set_values([balls[i] for i in changed.tolist()], values[changed].tolist())
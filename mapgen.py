@@ -0,0 +1,177 @@
+"""地图生成：先用带背景网格的 Poisson-disk 采样（Bridson）铺出一批互不重叠的候选位置，
+再按每组球的密度分布从候选里加权挑位置
+
+    gen = MapGenerator(1200, 600, radius=30, margin=10, edge=100)
+    positions = gen.generate(rng, [(4, "left"), (4, "right"), (9, "uniform")])
+
+候选点之间的距离都大于 2*radius + margin，采样过程步数有上限，一定会结束；
+候选不够放下所有球时抛 MapError，不会像逐个重试那样卡死。
+"""
+import math
+
+
+class MapError(Exception):
+    pass
+
+
+def uniform(u, v):
+    return 1.0
+
+
+def left(u, v):
+    """原来的蓝球分布：只在左半场，x = 左边界 + 半场宽 * r²，越靠左越密"""
+    t = 2 * u
+    if t >= 1:
+        return 0.0
+    return 1 / math.sqrt(max(t, 0.01))
+
+
+def right(u, v):
+    """原来的黄球分布：左右对称"""
+    return left(1 - u, v)
+
+
+def center(u, v):
+    """越靠中间越密"""
+    return max(0.0, 1 - math.hypot(u - 0.5, v - 0.5) * 2)
+
+
+def sector(i, n):
+    """多阵营开局用：绕场地中心按角度等分成 n 份，只在第 i 份里放，越靠外越密；第 0 份在正左方"""
+    width = 2 * math.pi / n
+    start = math.pi + i * width - width / 2
+
+    def profile(u, v):
+        angle = math.atan2(v - 0.5, u - 0.5)
+        if (angle - start) % (2 * math.pi) >= width:
+            return 0.0
+        return math.hypot(u - 0.5, v - 0.5)
+
+    return profile
+
+
+# 密度分布：参数为候选点在可用区域里的相对位置 (0~1, 0~1)，返回权重（0 表示不放）
+PROFILES = {
+    "uniform": uniform,
+    "left": left,
+    "right": right,
+    "center": center,
+}
+
+
+class MapGenerator:
+    """width, height: 场地大小；radius: 球半径；margin: 球之间最小空隙；edge: 边缘留白
+
+    tries: Bridson 每个活跃点最多试几个候选、连续投点落空几次算铺满，越大铺得越满
+    """
+
+    def __init__(self, width=1200, height=600, radius=30, margin=10, edge=100, tries=10):
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.min_dist = 2 * radius + margin
+        self.x0 = edge + radius
+        self.y0 = edge + radius
+        self.x1 = width - edge - radius
+        self.y1 = height - edge - radius
+        self.tries = tries
+        if self.x1 < self.x0 or self.y1 < self.y0:
+            raise MapError("场地太小，放不下一个球")
+
+    def candidates(self, rng, fixed=()):
+        """Poisson-disk 采样：返回整数坐标的候选点，和 fixed 里的点也保持间距"""
+        d = self.min_dist
+        cell = d / math.sqrt(2)  # 每个格子里最多一个点
+        cols = int((self.x1 - self.x0) / cell) + 1
+        rows = int((self.y1 - self.y0) / cell) + 1
+        # 四周各多留两圈空格子，找邻居时不用判断越界
+        stride = rows + 4
+        grid = [None] * ((cols + 4) * stride)  # 每格最多一个候选点
+        near = [gx * stride + gy for gx in range(-2, 3) for gy in range(-2, 3)]
+        extra = {}  # fixed 里的点不一定满足间距，单独按格子存
+        points = []
+        x0, y0 = self.x0, self.y0
+
+        def free(x, y):
+            cx = int((x - x0) // cell)
+            cy = int((y - y0) // cell)
+            center = (cx + 2) * stride + cy + 2
+            for offset in near:
+                p = grid[center + offset]
+                if p is not None and (x - p[0]) ** 2 + (y - p[1]) ** 2 <= d2:
+                    return False
+            if extra:
+                for gx in range(cx - 2, cx + 3):
+                    for gy in range(cy - 2, cy + 3):
+                        for px, py in extra.get((gx, gy), ()):
+                            if (x - px) ** 2 + (y - py) ** 2 <= d2:
+                                return False
+            return True
+
+        def add(x, y):
+            grid[(int((x - x0) // cell) + 2) * stride + int((y - y0) // cell) + 2] = (x, y)
+            points.append((x, y))
+
+        d2 = d * d
+        for x, y in fixed:
+            extra.setdefault((int((x - x0) // cell), int((y - y0) // cell)), []).append((x, y))
+
+        # 随机投点找空位当起点，从它往外铺到铺不动为止，再投下一个；
+        # 这样被 fixed 隔开的区域也能铺到。连续 tries 次投不中就认为铺满了。
+        # 每次投点要么加一个点，要么算一次落空；点数不超过格子数，所以一定会结束
+        misses = 0
+        while misses < self.tries:
+            x = rng.randint(self.x0, self.x1)
+            y = rng.randint(self.y0, self.y1)
+            if not free(x, y):
+                misses += 1
+                continue
+            misses = 0
+            add(x, y)
+            active = [(x, y)]
+            while active:
+                i = rng.randrange(len(active))
+                ax, ay = active[i]
+                for _ in range(self.tries):
+                    angle = rng.random() * 2 * math.pi
+                    dist = d * (1 + rng.random())
+                    x = round(ax + math.cos(angle) * dist)
+                    y = round(ay + math.sin(angle) * dist)
+                    if self.x0 <= x <= self.x1 and self.y0 <= y <= self.y1 and free(x, y):
+                        add(x, y)
+                        active.append((x, y))
+                        break
+                else:
+                    active[i] = active[-1]
+                    active.pop()
+        return points
+
+    def generate(self, rng, groups, fixed=()):
+        """groups 为 [(个数, 密度分布)]，分布可以是 PROFILES 里的名字或函数；
+        返回各组依次排好的位置列表（整数坐标）"""
+        pool = self.candidates(rng, fixed)
+        need = sum(count for count, _ in groups)
+        if need > len(pool):
+            raise MapError(f"场地里最多放 {len(pool)} 个球，要放 {need} 个")
+        w = max(self.x1 - self.x0, 1)
+        h = max(self.y1 - self.y0, 1)
+        taken = [False] * len(pool)
+        result = []
+        for count, profile in groups:
+            if isinstance(profile, str):
+                profile = PROFILES[profile]
+            # 加权不放回抽样：每个点取 随机数^(1/权重)，取最大的 count 个
+            keys = []
+            for i, (x, y) in enumerate(pool):
+                if taken[i]:
+                    continue
+                weight = profile((x - self.x0) / w, (y - self.y0) / h)
+                if weight > 0:
+                    keys.append((rng.random() ** (1 / weight), i))
+            if len(keys) < count:
+                raise MapError(f"密度分布允许的位置只有 {len(keys)} 个，要放 {count} 个")
+            keys.sort(reverse=True)
+            for _, i in keys[:count]:
+                taken[i] = True
+                result.append(pool[i])
+        return result
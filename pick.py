@@ -0,0 +1,136 @@
+"""鼠标点选用的网格索引：点落在哪个球里、悬停在哪条路径上
+
+场地按 cell 像素切成格子，每个球登记到它外接方框盖住的格子，
+每条路径登记到线段两侧各 tol 像素宽的条带经过的格子。
+查询时只看鼠标所在那一格里登记的球和路径，和球数、路径数无关。
+
+路径表挂上索引后增删会同步过来（PathRegistry.index）；
+球的位置只在换图、恢复快照时整体变化，这时距离表的 version 会变，下次查询前整个重建。
+"""
+import math
+
+
+def segment_hit(pos, start_pos, end_pos, tol):
+    """pos 到线段的垂直距离小于 tol，并且垂足落在线段上（不含两端的半圆）"""
+    x0, y0 = pos
+    x1, y1 = start_pos
+    x2, y2 = end_pos
+    den = math.hypot(y2 - y1, x2 - x1)
+    if den == 0:
+        return False
+    num = abs((y2 - y1) * x0 - (x2 - x1) * y0 + x2 * y1 - y2 * x1)
+    if num / den >= tol:
+        return False
+    dot1 = (x0 - x1) * (x2 - x1) + (y0 - y1) * (y2 - y1)
+    dot2 = (x0 - x2) * (x1 - x2) + (y0 - y2) * (y1 - y2)
+    return dot1 >= 0 and dot2 >= 0
+
+
+class PickIndex:
+    """engine: 球和路径的来源；cell: 格子边长；tol: 离路径多近算悬停在路径上"""
+
+    def __init__(self, engine, cell=64, tol=8):
+        self.engine = engine
+        self.cell = cell
+        self.tol = tol
+        self.layout_key = None
+        self.ball_cells = {}  # 格子 -> 球编号列表（按编号排序）
+        self.path_cells = {}  # 格子 -> {路径键: None}
+        self.path_keys = {}  # 路径键 -> 登记过的格子
+        self.order = {}  # 路径键 -> 添加顺序，同时命中几条路径时和路径表遍历顺序一致
+        self.counter = 0
+        engine.paths.index = self
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前球的位置和路径表整个重建"""
+        engine = self.engine
+        self.layout_key = engine.distances.version
+        self.ball_cells = {}
+        c = self.cell
+        for ball in engine.balls:
+            (x, y), r = ball.pos, ball.radius
+            for gx in range(int((x - r) // c), int((x + r) // c) + 1):
+                for gy in range(int((y - r) // c), int((y + r) // c) + 1):
+                    self.ball_cells.setdefault((gx, gy), []).append(ball.idx)
+        self.clear_paths()
+        for path in engine.paths:
+            self.add_path(path)
+
+    def check(self):
+        if self.engine.distances.version != self.layout_key:
+            self.rebuild()
+
+    def clear_paths(self):
+        self.path_cells = {}
+        self.path_keys = {}
+        self.order = {}
+
+    def segment_cells(self, start_pos, end_pos):
+        """条带经过的格子：按格子行切开线段，每行取这一段的横向范围再放宽 tol"""
+        c, tol = self.cell, self.tol
+        (x1, y1), (x2, y2) = start_pos, end_pos
+        cells = []
+        for gy in range(int((min(y1, y2) - tol) // c), int((max(y1, y2) + tol) // c) + 1):
+            lo, hi = gy * c - tol, (gy + 1) * c + tol
+            if y1 == y2:
+                t0, t1 = 0.0, 1.0
+            else:
+                t0, t1 = sorted(((lo - y1) / (y2 - y1), (hi - y1) / (y2 - y1)))
+                t0, t1 = max(t0, 0.0), min(t1, 1.0)
+                if t0 > t1:
+                    continue
+            xa, xb = x1 + (x2 - x1) * t0, x1 + (x2 - x1) * t1
+            for gx in range(int((min(xa, xb) - tol) // c), int((max(xa, xb) + tol) // c) + 1):
+                cells.append((gx, gy))
+        return cells
+
+    def add_path(self, path):
+        balls = self.engine.balls
+        start_pos, end_pos = balls[path.start_idx].pos, balls[path.end_idx].pos
+        if start_pos[0] == end_pos[0] and start_pos[1] == end_pos[1]:
+            return
+        key = path.key
+        cells = self.segment_cells(start_pos, end_pos)
+        for cell in cells:
+            self.path_cells.setdefault(cell, {})[key] = None
+        self.path_keys[key] = cells
+        self.order[key] = self.counter
+        self.counter += 1
+
+    def remove_path(self, path):
+        key = path.key
+        cells = self.path_keys.pop(key, None)
+        if cells is None:
+            return
+        del self.order[key]
+        for cell in cells:
+            bucket = self.path_cells[cell]
+            del bucket[key]
+            if not bucket:
+                del self.path_cells[cell]
+
+    def balls_at(self, pos):
+        """pos 落在里面的球编号，从小到大"""
+        self.check()
+        c = self.cell
+        balls = self.engine.balls
+        return [i for i in self.ball_cells.get((int(pos[0] // c), int(pos[1] // c)), ())
+                if math.hypot(pos[0] - balls[i].pos[0], pos[1] - balls[i].pos[1]) <= balls[i].radius]
+
+    def path_at(self, pos):
+        """鼠标悬停的路径；同时命中几条时取最早添加的那条，没有返回 None"""
+        self.check()
+        c = self.cell
+        bucket = self.path_cells.get((int(pos[0] // c), int(pos[1] // c)))
+        if not bucket:
+            return None
+        engine = self.engine
+        balls = engine.balls
+        best = None
+        for key in bucket:
+            if best is not None and self.order[key] > self.order[best]:
+                continue
+            if segment_hit(pos, balls[key[0]].pos, balls[key[1]].pos, self.tol):
+                best = key
+        return None if best is None else engine.paths.get(*best)
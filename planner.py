@@ -0,0 +1,170 @@
+"""前瞻规划 AI：把当前局面打成快照，给每个候选操作分叉出若干局，
+用现有的规则 AI 当默认策略往后推 horizon 帧，选平均得分最高的操作
+
+    engine.ai.planner = Planner(engine)               # 本进程内算，受 budget_ms 限制
+    engine.ai.planner = Planner(engine, workers=4)    # 丢给进程池，算完的那一帧再执行
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import Path
+from snapshot import fork, restore, snapshot
+
+BALL_WEIGHT = 20  # 得分里每个存活球折合多少数值
+CHECK_EVERY = 20  # 推演时每隔多少帧看一次有没有超时
+
+
+def score(engine, camp):
+    """己方（数值总和 + 球数加权）减去最强的非灰对手"""
+    index = engine.camp_index
+    gray = engine.gray_camp
+    mine = index.total(camp) + BALL_WEIGHT * index.count(camp)
+    rival = max((index.total(c) + BALL_WEIGHT * index.count(c)
+                 for c in engine.camps if c is not camp and c is not gray), default=0)
+    return mine - rival
+
+
+def apply_action(engine, camp, action, label="规划"):
+    """action 为要新建的 (起点, 终点) 列表；起点已不是己方存活球的跳过"""
+    for start, end in action:
+        src = engine.balls[start]
+        if src.camp is camp and src.value > 0 and (start, end) not in engine.paths:
+            engine.paths.add(Path(start, end, f"{label}({start+1}->{end+1})", camp))
+
+
+def run_rollout(engine, camp, action, horizon, seed, deadline=None):
+    """在 engine 上执行 action，用规则 AI 推 horizon 帧后打分（会改动 engine）
+
+    给了 deadline（perf_counter 的时刻）时每 CHECK_EVERY 帧检查一次，超时就放弃这次推演，返回 None
+    """
+    engine.ai.planner = None
+    engine.ai_enabled = True
+    engine.autoplay = True  # 玩家那边也用规则 AI 模拟
+    engine.rng.seed(seed)
+    engine.growth.seed(seed)
+    apply_action(engine, camp, action)
+    for tick in range(horizon):
+        if deadline is not None and tick % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            return None
+        if engine.update_game_logic() is not None:
+            break
+    return score(engine, camp)
+
+
+def rollout_job(job):
+    """进程池里跑的一次推演"""
+    data, camp_id, action, horizon, seed = job
+    engine = fork(data)
+    return run_rollout(engine, engine.camps[camp_id], action, horizon, seed)
+
+
+class Planner:
+    """给 AI 阵营挑操作的前瞻规划器
+
+    horizon: 每次推演往后推多少帧
+    rollouts: 每个候选最多推演几次（每次换一个随机种子）
+    budget_ms: 本进程内计算时每次决策的时间上限，默认值在 60 帧/秒的一帧以内，超时的推演中途放弃；
+               用进程池时为等待结果的上限（可以给得大，不占主循环的时间）；
+               None 表示不限时、推演次数固定（批量对局要结果可复现时用）
+    workers: 大于 0 时用进程池并行推演，结果出来后再执行，主循环不会被卡住
+    camps: 只对这些阵营用规划，None 表示所有 AI 阵营
+    """
+
+    def __init__(self, engine, horizon=180, rollouts=4, budget_ms=10, workers=0,
+                 max_candidates=10, camps=None):
+        self.engine = engine
+        self.horizon = horizon
+        self.rollouts = rollouts
+        self.budget_ms = budget_ms
+        self.max_candidates = max_candidates
+        self.camps = camps
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.pending = {}  # 阵营 -> (候选列表, [(候选序号, future)], 截止时间)
+        self._scratch = None
+
+    def controls(self, camp):
+        return self.camps is None or camp in self.camps
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def candidates(self, camp):
+        """候选操作：不动、最强的几个己方球各自打最近的几个非己方球、给最弱的己方球增援"""
+        engine = self.engine
+        index = engine.camp_index
+        dist = engine.distances
+        mine = index.balls(camp)
+        actions = [[]]
+        if not mine:
+            return actions
+        others = [b.idx for b in index.alive_balls() if b.camp is not camp]
+        sources = sorted((b for b in mine if b.value >= 5), key=lambda b: -b.value)[:3]
+        for src in sources:
+            targets = sorted(others, key=lambda i: dist.table[src.idx, i])[:3]
+            actions.extend([[(src.idx, t)] for t in targets])
+        weakest = min(mine, key=lambda b: b.value)
+        for src in sources:
+            if src is not weakest:
+                actions.append([(src.idx, weakest.idx)])
+                break
+        if len(sources) > 1 and others:
+            # 集火：最强的几个球一起打离它们最近的那个球
+            target = dist.closest([b.idx for b in sources], others)
+            actions.append([(b.idx, target) for b in sources])
+        actions = [a for a in actions if all(key not in engine.paths for key in a)]
+        return actions[:self.max_candidates] or [[]]
+
+    def act(self, camp):
+        """到了 camp 的决策时机：算出（或提交）候选操作的推演"""
+        if camp in self.pending:
+            return
+        actions = self.candidates(camp)
+        if len(actions) == 1:
+            apply_action(self.engine, camp, actions[0])
+            return
+        data = snapshot(self.engine)
+        camp_id = self.engine.projectiles.camp_ids[camp]
+        base_seed = self.engine.frame_count
+        if self.pool is not None:
+            futures = [(i, self.pool.submit(rollout_job, (data, camp_id, a, self.horizon, base_seed + r)))
+                       for r in range(self.rollouts) for i, a in enumerate(actions)]
+            budget = float("inf") if self.budget_ms is None else self.budget_ms / 1000
+            self.pending[camp] = (actions, futures, time.perf_counter() + budget)
+            return
+        deadline = None if self.budget_ms is None else time.perf_counter() + self.budget_ms / 1000
+        scores = {}
+        if self._scratch is None:
+            self._scratch = fork(data)
+        for r in range(self.rollouts):
+            for i, action in enumerate(actions):
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+                restore(self._scratch, data)
+                result = run_rollout(self._scratch, self._scratch.camps[camp_id], action, self.horizon,
+                                     base_seed + r, deadline)
+                if result is not None:
+                    scores.setdefault(i, []).append(result)
+        self.choose(camp, actions, scores)
+
+    def poll(self):
+        """检查进程池里的推演，算完（或到时间）的阵营执行得分最高的操作"""
+        now = time.perf_counter()
+        for camp, (actions, futures, deadline) in list(self.pending.items()):
+            if now < deadline and not all(f.done() for _, f in futures):
+                continue
+            scores = {}
+            for i, f in futures:
+                if f.done() and not f.cancelled() and f.exception() is None:
+                    scores.setdefault(i, []).append(f.result())
+                else:
+                    f.cancel()
+            del self.pending[camp]
+            self.choose(camp, actions, scores)
+
+    def choose(self, camp, actions, scores):
+        if not scores:
+            return
+        best = max(scores, key=lambda i: (sum(scores[i]) / len(scores[i]), -i))
+        apply_action(self.engine, camp, actions[best])
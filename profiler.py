@@ -0,0 +1,110 @@
+"""分段计时和计数器：规则每一步、前端事件处理和绘制各花多少时间，滚动统计 p50/p99
+
+    engine.profiler = Profiler()    # 挂上后 Engine.update_game_logic 分段计时，每秒记一行计数器
+    profiler.add("draw", seconds)   # 前端自己计的段
+    profiler.save_csv("prof.csv")   # 计数器导出
+"""
+import csv
+import time
+from collections import deque
+
+# 显示顺序；events、draw 由前端计时，其余在 Engine.update_game_logic 里
+SECTIONS = ("events", "ai", "arrival", "fire", "cancel", "growth", "check", "draw")
+
+
+class Profiler:
+    """window: 每段保留最近多少次的耗时；max_rows: 计数器最多保留多少秒"""
+
+    def __init__(self, window=240, max_rows=3600):
+        self.window = window
+        self.samples = {name: deque(maxlen=window) for name in SECTIONS}
+        self.rows = deque(maxlen=max_rows)
+        self.started = time.perf_counter()
+        self._mark = self.started
+        self._frame = {}
+        self._last_counts = None
+        self._lines = []
+        self._lines_time = 0.0
+
+    def add(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def start(self):
+        """一步逻辑开始，之后每个 lap 记下距上一个标记的耗时"""
+        self._mark = time.perf_counter()
+        self._frame = {}
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self._frame[name] = self._frame.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    def commit(self, engine):
+        """一步逻辑结束：各段耗时入统计，每满一秒（按帧数）记一行计数器"""
+        for name, seconds in self._frame.items():
+            self.add(name, seconds)
+        self._frame = {}
+        if engine.frame_count % engine.fps == 0:
+            self.record(engine)
+
+    def percentiles(self, name):
+        """(p50, p99)，单位毫秒；还没有数据返回 None"""
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        s = sorted(samples)
+        n = len(s) - 1
+        return s[int(n * 0.5)] * 1000, s[int(n * 0.99)] * 1000
+
+    def record(self, engine):
+        store = engine.projectiles
+        counts = (engine.frame_count, store.cancel_count, store.arrival_count)
+        last = self._last_counts or counts
+        self._last_counts = counts
+        seconds = max(counts[0] - last[0], 1) / engine.fps
+        row = {
+            "frame": engine.frame_count,
+            "wall_s": round(time.perf_counter() - self.started, 3),
+            "projectiles": len(store),
+            "paths": len(engine.paths),
+            "cancels_per_s": round((counts[1] - last[1]) / seconds, 1),
+            "arrivals_per_s": round((counts[2] - last[2]) / seconds, 1),
+        }
+        for name in self.samples:
+            p = self.percentiles(name)
+            row[f"{name}_p50_ms"] = round(p[0], 4) if p else ""
+            row[f"{name}_p99_ms"] = round(p[1], 4) if p else ""
+        self.rows.append(row)
+
+    def save_csv(self, path):
+        """计数器写成 CSV；还没有记满一秒、一行都没有时不写文件，返回 False"""
+        if not self.rows:
+            return False
+        fields = []
+        for row in self.rows:
+            fields.extend(k for k in row if k not in fields)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        return True
+
+    def overlay_lines(self, refresh=0.5):
+        """叠加显示用的文字行；每 refresh 秒才重算一次，文字不会每帧跳动"""
+        now = time.perf_counter()
+        if now - self._lines_time < refresh:
+            return self._lines
+        self._lines_time = now
+        lines = []
+        for name in self.samples:
+            p = self.percentiles(name)
+            if p is not None:
+                lines.append(f"{name:8s} p50 {p[0]:6.2f}ms  p99 {p[1]:6.2f}ms")
+        if self.rows:
+            row = self.rows[-1]
+            lines.append(f"小球 {row['projectiles']}  路径 {row['paths']}  抵消/秒 {row['cancels_per_s']}")
+        self._lines = lines
+        return lines
@@ -0,0 +1,302 @@
+import heapq
+import math
+
+import numpy as np
+
+
+def flight_ticks(pos, vel, center, radius):
+    """从 pos 以速度 vel 飞向圆心 center 的小球，第几帧进入半径 radius（第 k 帧位置为 pos + k*vel）"""
+    ox, oy = pos
+    vx, vy = vel
+    cx, cy = center
+    k = max(1, math.ceil(math.hypot(cx - ox, cy - oy) - radius))
+    while k > 1 and math.hypot(ox + (k - 1) * vx - cx, oy + (k - 1) * vy - cy) <= radius:
+        k -= 1
+    while math.hypot(ox + k * vx - cx, oy + k * vy - cy) > radius:
+        k += 1
+    return k
+
+
+class ProjectileStore:
+    """飞行中的小球，按列存放在连续数组里（出发点、速度、发射帧、到达帧、目标球、阵营、存活标记）
+
+    小球匀速直线飞向不动的目标球，发射时就能算出到达的帧，按 (到达帧, 编号) 放进堆里，
+    每帧只弹出这一帧到达的；抵消掉的小球只标记死亡，堆里的记录弹出时再跳过。
+    位置不逐帧累加，要画图或检测抵消时按 出发点 + 已飞帧数 * 速度 现算。
+    """
+
+    def __init__(self, camps, capacity=256):
+        self.camps = camps
+        self.camp_ids = {camp: i for i, camp in enumerate(camps)}
+        self.count = 0      # 数组里已用的行数（含已死亡、还没压缩掉的）
+        self.live = 0       # 存活的小球数
+        self.tick = 0       # 最近一次 step 的帧号，位置按它来算
+        self.next_uid = 0
+        self._heap = []     # (到达帧, 编号)
+        self.cancel_count = 0   # 累计抵消掉的小球数（统计用）
+        self.arrival_count = 0  # 累计到达目标的小球数（统计用）
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self.origin = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.launch = np.zeros(capacity, dtype=np.int64)
+        self.arrive = np.zeros(capacity, dtype=np.int64)
+        self.uid = np.zeros(capacity, dtype=np.int64)
+        self.target = np.zeros(capacity, dtype=np.int32)
+        self.camp = np.zeros(capacity, dtype=np.int16)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def _columns(self):
+        return (self.origin, self.vel, self.launch, self.arrive, self.uid, self.target, self.camp, self.alive)
+
+    def _grow(self):
+        n = self.count
+        old = self._columns()
+        self._alloc(max(256, len(self.origin) * 2))
+        for new, arr in zip(self._columns(), old):
+            new[:n] = arr[:n]
+
+    def __len__(self):
+        return self.live
+
+    def clear(self):
+        self.alive[:self.count] = False
+        self.count = 0
+        self.live = 0
+        self._heap = []
+
+    def load(self, origin, vel, launch, arrive, target, camp, tick):
+        """整体换成给定的数组内容（恢复快照用），数组会被拷贝"""
+        n = len(target)
+        if n > len(self.origin):
+            self._alloc(max(256, n))
+        self.alive[:self.count] = False
+        self.origin[:n] = origin
+        self.vel[:n] = vel
+        self.launch[:n] = launch
+        self.arrive[:n] = arrive
+        self.uid[:n] = np.arange(n)
+        self.target[:n] = target
+        self.camp[:n] = camp
+        self.alive[:n] = True
+        self.count = self.live = self.next_uid = n
+        self.tick = tick
+        self._heap = list(zip(self.arrive[:n].tolist(), range(n)))
+        heapq.heapify(self._heap)
+
+    def spawn(self, pos, vel, target, camp):
+        """从 pos 以速度 vel 向目标球 target 发射一个小球，算出到达帧放进堆里，返回小球编号"""
+        if self.count == len(self.origin):
+            self._grow()
+        k = flight_ticks(pos, vel, target.pos, target.radius)
+        i = self.count
+        uid = self.next_uid
+        self.origin[i] = pos
+        self.vel[i] = vel
+        self.launch[i] = self.tick
+        self.arrive[i] = self.tick + k
+        self.uid[i] = uid
+        self.target[i] = target.idx
+        self.camp[i] = self.camp_ids[camp]
+        self.alive[i] = True
+        self.count += 1
+        self.live += 1
+        self.next_uid += 1
+        heapq.heappush(self._heap, (self.tick + k, uid))
+        return uid
+
+    def _rows(self, uids):
+        """编号 -> 所在行，已经压缩掉的给 -1"""
+        n = self.count
+        if n == 0:
+            return np.full(len(uids), -1)
+        rows = np.minimum(np.searchsorted(self.uid[:n], uids), n - 1)
+        return np.where(self.uid[rows] == uids, rows, -1)
+
+    def is_alive(self, uid):
+        row = int(self._rows(np.array([uid]))[0])
+        return row >= 0 and bool(self.alive[row])
+
+    def kill(self, uids):
+        """按编号抵消掉一批小球（已经死亡的忽略）"""
+        rows = self._rows(np.asarray(uids, dtype=np.int64))
+        rows = rows[rows >= 0]
+        rows = rows[self.alive[rows]]
+        if len(rows):
+            rows = np.unique(rows)
+            self.cancel_count += len(rows)
+            self._discard(rows)
+
+    def _live_rows(self):
+        return np.flatnonzero(self.alive[:self.count])
+
+    def _positions(self, rows, alpha=1.0):
+        flown = (self.tick - self.launch[rows]).astype(np.float64)
+        if alpha < 1.0:
+            flown -= 1.0 - alpha
+        return self.origin[rows] + self.vel[rows] * flown[:, None]
+
+    def positions(self, alpha=1.0):
+        """存活小球的位置（按发射顺序）：alpha < 1 时在上一帧和这一帧的位置之间插值"""
+        return self._positions(self._live_rows(), alpha)
+
+    def visible(self, alpha=1.0):
+        """画图用：存活小球的 (位置数组, 阵营编号数组)，按发射顺序"""
+        rows = self._live_rows()
+        return self._positions(rows, alpha), self.camp[rows]
+
+    def items(self, alpha=1.0):
+        """按发射顺序给出 (x, y, 阵营)，画图用"""
+        camps = self.camps
+        pos, camp = self.visible(alpha)
+        for (x, y), c in zip(pos.tolist(), camp.tolist()):
+            yield x, y, camps[c]
+
+    def compact(self):
+        """把已标记死亡的小球一次性清掉，保持原有先后顺序"""
+        n = self.count
+        keep = self._live_rows()
+        m = len(keep)
+        if m == n:
+            return
+        for arr in self._columns()[:-1]:
+            arr[:m] = arr[keep]
+        self.alive[:m] = True
+        self.alive[m:n] = False
+        self.count = m
+
+    def _discard(self, rows):
+        self.alive[rows] = False
+        self.live -= len(rows)
+        # 死亡的行攒到比存活的还多时再压缩，平摊下来每帧的开销只和死亡数有关
+        if self.count - self.live > max(64, self.live):
+            self.compact()
+
+    def step(self, balls, tick):
+        """推进到第 tick 帧，结算这一帧到达目标球的小球"""
+        self.tick = tick
+        heap = self._heap
+        if not heap or heap[0][0] > tick:
+            return
+        uids = []
+        while heap and heap[0][0] <= tick:
+            uids.append(heapq.heappop(heap)[1])
+        # 编号按发射顺序递增，数组也按发射顺序排列，二分就能找到所在行；
+        # 已经压缩掉的（早先抵消了的）找不到自己的编号，跳过
+        rows = self._rows(np.sort(np.array(uids, dtype=np.int64)))
+        rows = rows[rows >= 0]
+        hit = rows[self.alive[rows]]
+        if len(hit) == 0:
+            return
+        self._resolve(hit, balls)
+        self.arrival_count += len(hit)
+        self._discard(hit)
+
+    def _resolve(self, hit, balls):
+        # 同一目标球按发射顺序结算；不同目标球互不影响
+        tgts = self.target[hit]
+        order = np.argsort(tgts, kind="stable")
+        tgts = tgts[order]
+        camps = self.camp[hit][order]
+        uniq, starts, counts = np.unique(tgts, return_index=True, return_counts=True)
+        for t, s, k in zip(uniq.tolist(), starts.tolist(), counts.tolist()):
+            group = camps[s:s + k]
+            ball = balls[t]
+            if k == 1 or (group == group[0]).all():
+                # 同一阵营的一批小球可以直接算出结果
+                camp = self.camps[int(group[0])]
+                if ball.camp == camp:
+                    ball.value += k
+                elif k > ball.value:
+                    ball.camp = camp
+                    ball.value = k - ball.value
+                else:
+                    ball.value -= k
+                continue
+            for c in group.tolist():
+                camp = self.camps[c]
+                # 球归属变更或加减值
+                if ball.value == 0:
+                    ball.camp = camp
+                    ball.value = 1
+                elif camp == ball.camp:
+                    ball.value += 1
+                else:
+                    ball.value -= 1
+
+    def cancel(self, radius=10):
+        """不同阵营小球相遇两两抵消，每个小球最多抵消一次
+
+        按 radius 大小的网格分桶，只比较相邻格子里的小球；
+        配对仍按发射顺序贪心：每个小球找排在它后面、尚未抵消的第一个对手。
+        抵消掉的小球只标记死亡，堆里的到达记录留着，弹出时跳过。
+        """
+        rows = self._live_rows()
+        if len(rows) < 2:
+            return
+        ii, jj = self._close_pairs(self._positions(rows), self.camp[rows], radius)
+        if len(ii) == 0:
+            return
+        order = np.lexsort((jj, ii))
+        alive = np.ones(len(rows), dtype=bool)
+        for i, j in zip(ii[order].tolist(), jj[order].tolist()):
+            if alive[i] and alive[j]:
+                alive[i] = False
+                alive[j] = False
+        dead = rows[~alive]
+        self.cancel_count += len(dead)
+        self._discard(dead)
+
+    @staticmethod
+    def _close_pairs(pos, camp, radius):
+        """空间哈希粗筛：返回所有距离小于 radius 的异阵营小球对 (i < j)
+
+        格子键排一次序，得到有小球的格子和各自在排序数组里的区间；
+        每个格子只和自己、以及右、右上、右下、下这 4 个邻格配对，每对格子只比一次。
+        邻格的键也是有序的，查找时顺着有序数组走，不用对每个小球各查一遍。
+        """
+        n = len(pos)
+        idx = np.arange(n)
+        cell = np.floor(pos / radius).astype(np.int64)
+        cx = cell[:, 0] - cell[:, 0].min() + 1
+        cy = cell[:, 1] - cell[:, 1].min() + 1
+        w = int(cy.max()) + 2
+        key = cx * w + cy
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+        cells = sorted_key[starts]
+        counts = np.diff(np.r_[starts, n])
+        sx, sy = pos[order, 0], pos[order, 1]
+        sorted_camp = camp[order]
+        found_i, found_j = [], []
+        for off in (0, 1, w - 1, w, w + 1):
+            if off == 0:
+                a = np.flatnonzero(counts > 1)
+                b = a
+            else:
+                b = np.searchsorted(cells, cells + off)
+                a = np.flatnonzero((b < len(cells)) & (cells[np.minimum(b, len(cells) - 1)] == cells + off))
+                b = b[a]
+            if len(a) == 0:
+                continue
+            # 两个格子里的小球两两组合
+            ca, cb = counts[a], counts[b]
+            per = ca * cb
+            blk = np.repeat(np.arange(len(a)), per)
+            k = np.arange(int(per.sum())) - np.repeat(np.cumsum(per) - per, per)
+            u = starts[a][blk] + k // cb[blk]
+            v = starts[b][blk] + k % cb[blk]
+            if off == 0:
+                keep = u < v
+                u, v = u[keep], v[keep]
+            keep = sorted_camp[u] != sorted_camp[v]
+            u, v = u[keep], v[keep]
+            keep = np.hypot(sx[u] - sx[v], sy[u] - sy[v]) < radius
+            ii, jj = order[u[keep]], order[v[keep]]
+            found_i.append(np.minimum(ii, jj))
+            found_j.append(np.maximum(ii, jj))
+        if not found_i:
+            return idx[:0], idx[:0]
+        return np.concatenate(found_i), np.concatenate(found_j)
@@ -0,0 +1,170 @@
+import os
+from collections import OrderedDict
+
+import pygame
+
+from engine import COLORS
+
+FONT_PATH = "C:/Windows/Fonts/simhei.ttf"
+COLORKEY = (255, 0, 255)  # 贴图透明色，不能和任何阵营颜色相同
+
+
+def load_font(size=24):
+    """优先用黑体；没有这个字体的机器（比如 Linux 服务器）退回 pygame 自带字体"""
+    if os.path.exists(FONT_PATH):
+        return pygame.font.Font(FONT_PATH, size)
+    return pygame.font.Font(None, size)
+
+
+class LabelCache:
+    """文字贴图缓存，按 (文字, 颜色) 存，超出容量时淘汰最久没用过的"""
+
+    def __init__(self, font, maxsize=512):
+        self.font = font
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, text, color):
+        key = (text, color)
+        surf = self._cache.get(key)
+        if surf is None:
+            surf = self.font.render(text, True, color)
+            self._cache[key] = surf
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return surf
+
+
+PROJECTILE_RADIUS = 5
+
+
+class Renderer:
+    """对局画面：路径画在静态背景层上，路径变化时才重画；
+    每帧只把上一帧画过的区域用背景盖回去，再画小球、球和文字，最后只刷新这些区域
+
+    mode="batched"：小球用各阵营预先画好的贴图，直接从位置数组生成一次 blits 调用；
+    mode="legacy"：旧画法，每帧整屏重画、每个小球一次 draw.circle，留着做性能对比
+    """
+
+    MODES = ("batched", "legacy")
+
+    def __init__(self, surface, font, mode="batched"):
+        self.surface = surface
+        self.font = font
+        self.mode = mode
+        self.labels = LabelCache(font)
+        self.background = pygame.Surface(surface.get_size())
+        self.background_key = None
+        self.ball_sprites = {}
+        self.projectile_sprites = {}
+        self.dirty = []     # 本帧画过的区域
+        self.restored = []  # 上一帧画过、本帧用背景盖回去的区域
+        self.full = True
+        self.max_rects = 400  # 脏矩形太多时直接整屏刷新
+
+    def invalidate(self):
+        """屏幕被别的界面画过（菜单、弹窗），下一帧整屏重画"""
+        self.full = True
+
+    def draw_background(self, engine):
+        bg = self.background
+        bg.fill(COLORS["WHITE"])
+        for path in engine.paths:
+            start_pos = engine.balls[path.start_idx].pos
+            end_pos = engine.balls[path.end_idx].pos
+            pygame.draw.line(bg, path.camp.color, start_pos, end_pos, 8)
+            pygame.draw.line(bg, COLORS["GRAY"], start_pos, end_pos, 6)
+
+    def ball_sprite(self, color, radius):
+        key = (color, radius)
+        sprite = self.ball_sprites.get(key)
+        if sprite is None:
+            size = radius * 2 + 2
+            sprite = pygame.Surface((size, size))
+            sprite.fill(COLORKEY)
+            sprite.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            self.ball_sprites[key] = sprite
+        return sprite
+
+    def draw(self, engine, hud=(), alpha=1.0):
+        """画一帧对局画面；hud 为 [(文字, 左上角位置)]，alpha 为小球位置插值系数"""
+        if self.mode == "legacy":
+            self.draw_legacy(engine, hud, alpha)
+            return
+        if engine.paths.version != self.background_key:
+            self.draw_background(engine)
+            self.background_key = engine.paths.version
+            self.full = True
+        screen = self.surface
+        if self.full:
+            screen.blit(self.background, (0, 0))
+            self.restored = []
+        else:
+            for rect in self.dirty:
+                screen.blit(self.background, rect, rect)
+            self.restored = self.dirty
+        dirty = self.dirty = []
+
+        for text, pos in hud:
+            dirty.append(screen.blit(self.labels.get(text, COLORS["BLACK"]), pos))
+        dirty.extend(self.draw_projectiles(engine.projectiles, alpha))
+        for ball in engine.balls:
+            r = ball.radius
+            dirty.append(screen.blit(self.ball_sprite(ball.camp.color, r), (ball.pos[0] - r, ball.pos[1] - r)))
+            text_color = COLORS["BLACK"] if ball.camp.color == COLORS["YELLOW"] else COLORS["WHITE"]
+            label = self.labels.get(str(ball.value), text_color)
+            dirty.append(screen.blit(label, label.get_rect(center=ball.pos)))
+
+    def draw_projectiles(self, store, alpha=1.0):
+        """所有小球一次 blits 画完，返回画到的区域"""
+        if len(store) == 0:
+            return []
+        r = PROJECTILE_RADIUS
+        sprites = [self.ball_sprite(camp.color, r) for camp in store.camps]
+        pos, camp = store.visible(alpha)
+        # 和 draw.circle 一样先取整再减半径，保证像素一致
+        xy = pos.astype(int) - r
+        seq = [(sprites[c], (x, y)) for c, (x, y) in zip(camp.tolist(), xy.tolist())]
+        return self.surface.blits(seq)
+
+    def draw_legacy(self, engine, hud, alpha=1.0):
+        screen = self.surface
+        screen.fill(COLORS["WHITE"])
+        for text, pos in hud:
+            screen.blit(self.font.render(text, True, COLORS["BLACK"]), pos)
+        for path in engine.paths:
+            start_pos = engine.balls[path.start_idx].pos
+            end_pos = engine.balls[path.end_idx].pos
+            pygame.draw.line(screen, path.camp.color, start_pos, end_pos, 8)
+            pygame.draw.line(screen, COLORS["GRAY"], start_pos, end_pos, 6)
+        for x, y, camp in engine.projectiles.items(alpha):
+            pygame.draw.circle(screen, camp.color, (int(x), int(y)), PROJECTILE_RADIUS)
+        for ball in engine.balls:
+            pygame.draw.circle(screen, ball.camp.color, ball.pos, ball.radius)
+            text_color = COLORS["BLACK"] if ball.camp.color == COLORS["YELLOW"] else COLORS["WHITE"]
+            ball_text = self.font.render(str(ball.value), True, text_color)
+            screen.blit(ball_text, ball_text.get_rect(center=ball.pos))
+        self.dirty = []
+        self.background_key = None
+        self.full = True
+
+    def mark(self, rect):
+        """前端自己画的东西（拖线、命令框）也登记进来，下一帧会被盖掉"""
+        self.dirty.append(rect)
+
+    def present(self):
+        if self.full or len(self.restored) + len(self.dirty) > self.max_rects:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.restored + self.dirty)
+        self.full = False
+
+    def finish(self):
+        """离屏绘制（surface 不是窗口）时代替 present：不刷新显示，只结束这一帧"""
+        self.full = False
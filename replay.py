@@ -0,0 +1,233 @@
+"""对局录像：记录种子、开局布局和每一次路径增删（带帧号），回放时用同一套规则全速重跑
+
+文件格式（小端）：
+    头    4s 魔数 "BEES"、B 版本、q 种子、i 关卡、H 抵消检测间隔、H 球数、B 抵消方式（0 网格 1 按路径）、
+          B 参战阵营数、H 场地宽、H 场地高、H 每个阵营的球数（灰球数 = 球数 - 阵营数 * 每个阵营的球数）
+    球    每个球 d x、d y、B 阵营编号、i 数值
+    事件  每条 I 帧号、B 类型、H a、H b、I c
+          ADD a=起点 b=终点 c=阵营编号；REMOVE a=起点 b=终点；
+          RESET / NEXT_LEVEL 无参数；CANCEL_MODE a=抵消方式；END c=结束时的状态校验值
+
+    python replay.py match.bees            # 全速回放并校验
+    python replay.py match.bees --tick 3600
+"""
+import argparse
+import struct
+import zlib
+
+from engine import Engine, Path
+from snapshot import restore, snapshot
+
+MAGIC = b"BEES"
+VERSION = 5  # 4：增长改用 growth.py 的随机数，旧录像的结果对不上；5：头里加上场地大小和每个阵营的球数
+HEADER = struct.Struct("<4sBqiHHBBHHH")
+BALL = struct.Struct("<ddBi")
+EVENT = struct.Struct("<IBHHI")
+
+ADD, REMOVE, RESET, NEXT_LEVEL, CANCEL_MODE, END = 1, 2, 3, 4, 5, 255
+CANCEL_MODES = ("grid", "streams")
+
+
+class ReplayError(Exception):
+    pass
+
+
+def state_digest(engine):
+    """对局状态的校验值：球、路径、飞行中的小球、帧号"""
+    crc = zlib.crc32(struct.pack("<Ii", engine.frame_count, engine.level))
+    camp_ids = engine.projectiles.camp_ids
+    for ball in engine.balls:
+        crc = zlib.crc32(struct.pack("<ddBi", ball.pos[0], ball.pos[1], camp_ids[ball.camp], ball.value), crc)
+    for path in engine.paths:
+        crc = zlib.crc32(struct.pack("<HHBq", path.start_idx, path.end_idx,
+                                     camp_ids[path.camp], path.last_shot_frame), crc)
+    store = engine.projectiles
+    store.compact()
+    n = store.count
+    for arr in (store.origin, store.vel, store.launch, store.target, store.camp):
+        crc = zlib.crc32(arr[:n].tobytes(), crc)
+    return crc
+
+
+class Recorder:
+    """挂到一局刚开始的 Engine 上，把之后所有的路径增删、重置、换关记下来"""
+
+    def __init__(self, engine):
+        if engine.frame_count != 0:
+            raise ReplayError("只能从第0帧开始录像")
+        self.engine = engine
+        camp_ids = engine.projectiles.camp_ids
+        self.buf = bytearray(HEADER.pack(MAGIC, VERSION, engine.seed, engine.level, engine.cancel_interval,
+                                         len(engine.balls), CANCEL_MODES.index(engine.cancel_mode),
+                                         engine.camp_count, engine.width, engine.height, engine.camp_balls))
+        for ball in engine.balls:
+            self.buf += BALL.pack(ball.pos[0], ball.pos[1], camp_ids[ball.camp], ball.value)
+        engine.paths.listener = self.on_path
+        engine.recorder = self
+
+    def event(self, kind, a=0, b=0, c=0):
+        self.buf += EVENT.pack(self.engine.frame_count, kind, a, b, c)
+
+    def on_path(self, kind, path):
+        if kind == "add":
+            self.event(ADD, path.start_idx, path.end_idx, self.engine.projectiles.camp_ids[path.camp])
+        else:
+            self.event(REMOVE, path.start_idx, path.end_idx)
+
+    def on_reset(self):
+        self.event(RESET)
+
+    def on_next_level(self):
+        self.event(NEXT_LEVEL)
+
+    def on_cancel_mode(self, mode):
+        self.event(CANCEL_MODE, CANCEL_MODES.index(mode))
+
+    def finish(self):
+        """返回完整录像（末尾带当前帧的状态校验值），录像器可以继续用"""
+        return bytes(self.buf) + EVENT.pack(self.engine.frame_count, END, 0, 0, state_digest(self.engine))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.finish())
+
+
+class Replay:
+    """解析好的录像"""
+
+    def __init__(self, data):
+        (magic, version, self.seed, self.level, self.cancel_interval, n, mode,
+         self.camp_count, self.width, self.height, self.camp_balls) = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("不是录像文件或版本不对")
+        self.cancel_mode = CANCEL_MODES[mode]
+        offset = HEADER.size
+        self.balls = [BALL.unpack_from(data, offset + i * BALL.size) for i in range(n)]
+        offset += n * BALL.size
+        if (len(data) - offset) % EVENT.size:
+            raise ReplayError("录像文件不完整")
+        self.events = list(EVENT.iter_unpack(data[offset:]))
+        self.end_tick = None
+        self.end_digest = None
+        if self.events and self.events[-1][1] == END:
+            self.end_tick, _, _, _, self.end_digest = self.events.pop()
+
+    @property
+    def last_tick(self):
+        """录像到哪一帧结束：有 END 记录时为它的帧号，没有时（录制中途断了）为最后一个事件的帧号"""
+        if self.end_tick is not None:
+            return self.end_tick
+        return self.events[-1][0] if self.events else 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def new_engine(self):
+        """按录像的种子建一局，检查开局布局一致；AI 关掉，所有操作都来自录像"""
+        engine = Engine(seed=self.seed, camp_count=self.camp_count, width=self.width, height=self.height,
+                        camp_balls=self.camp_balls, gray_count=len(self.balls) - self.camp_balls * self.camp_count)
+        engine.level = self.level
+        engine.cancel_interval = self.cancel_interval
+        engine.cancel_mode = self.cancel_mode
+        engine.ai_enabled = False
+        camp_ids = engine.projectiles.camp_ids
+        layout = [(b.pos[0], b.pos[1], camp_ids[b.camp], b.value) for b in engine.balls]
+        if layout != [tuple(b) for b in self.balls]:
+            raise ReplayError("开局布局和录像不一致")
+        return engine
+
+
+class ReplayPlayer:
+    """全速重跑录像，可以跳到任意一帧
+
+    跑过的地方每隔 keyframe_interval 帧存一个快照，之后跳转先恢复到最近的快照再往后跑，
+    所以跳转的耗时最多是 keyframe_interval 帧的模拟。build_index() 可以提前跑完整局把快照存齐。
+    """
+
+    def __init__(self, replay, keyframe_interval=120):
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {}  # 帧号 -> (快照, 事件游标)
+        self.restart()
+
+    def restart(self):
+        self.engine = self.replay.new_engine()
+        self.cursor = 0
+
+    @property
+    def tick(self):
+        return self.engine.frame_count
+
+    def apply_events(self):
+        """把这一帧记下来的操作按原顺序放进去（相当于原来 AI 和鼠标在这一帧做的事）"""
+        engine = self.engine
+        events = self.replay.events
+        while self.cursor < len(events) and events[self.cursor][0] == engine.frame_count:
+            _, kind, a, b, c = events[self.cursor]
+            self.cursor += 1
+            if kind == ADD:
+                engine.paths.add(Path(a, b, f"回放({a+1}->{b+1})", engine.camps[c]))
+            elif kind == REMOVE:
+                path = engine.paths.get(a, b)
+                if path is not None:
+                    engine.paths.remove(path)
+            elif kind == RESET:
+                engine.reset()
+            elif kind == NEXT_LEVEL:
+                engine.next_level()
+            elif kind == CANCEL_MODE:
+                engine.set_cancel_mode(CANCEL_MODES[a])
+
+    def step(self):
+        tick = self.engine.frame_count
+        if tick % self.keyframe_interval == 0 and tick not in self.keyframes:
+            self.keyframes[tick] = (snapshot(self.engine), self.cursor)
+        self.apply_events()
+        return self.engine.update_game_logic()
+
+    def seek(self, tick):
+        """重建第 tick 帧的状态：已经跑完 tick 步，并且放进了这一帧的所有操作"""
+        current = self.engine.frame_count
+        best = max((k for k in self.keyframes if k <= tick), default=None)
+        if tick < current or (best is not None and best > current):
+            if best is None:
+                self.restart()
+            else:
+                data, self.cursor = self.keyframes[best]
+                restore(self.engine, data)
+        while self.engine.frame_count < tick:
+            self.step()
+        self.apply_events()
+        return self.engine
+
+    def build_index(self):
+        """跑完整局录像，把沿途的快照都存下来"""
+        self.seek(self.replay.last_tick)
+
+    def verify(self):
+        """跑到录像结尾，检查状态和录制时一致"""
+        if self.replay.end_tick is None:
+            raise ReplayError("录像没有结尾校验值")
+        self.seek(self.replay.end_tick)
+        return state_digest(self.engine) == self.replay.end_digest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="全速回放录像")
+    parser.add_argument("path")
+    parser.add_argument("--tick", type=int, help="只跑到这一帧并打印球的状态")
+    args = parser.parse_args(argv)
+    player = ReplayPlayer(Replay.load(args.path))
+    if args.tick is None:
+        ok = player.verify()
+        print(f"回放到第{player.tick}帧，校验{'通过' if ok else '失败'}")
+        return
+    engine = player.seek(args.tick)
+    for ball in engine.balls:
+        print(ball.idx + 1, ball.camp.name, ball.value)
+
+
+if __name__ == "__main__":
+    main()
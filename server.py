@@ -0,0 +1,507 @@
+"""联机服务器：一个进程里用 asyncio 按固定帧率推进多局对局，规则只在服务器上算
+
+客户端通过 TCP 发路径增删，服务器每隔几帧只把变了的东西（球的阵营/数值、增删的路径）发回去。
+没有联机玩家占着的阵营由 AI 操作。
+
+协议：每条消息一行 JSON（UTF-8，换行结尾）
+    客户端 -> 服务器
+        {"type": "join", "match": 房间名, "account": 账号, "camps": 参战阵营数}   房间不存在就新建
+        {"type": "add", "a": 起点, "b": 终点}
+        {"type": "remove", "a": 起点, "b": 终点}
+    服务器 -> 客户端
+        state   加入时、换关后的完整状态：frame、level、camps [名字, 颜色]、balls [x, y, 半径, 阵营, 数值]、
+                paths [起点, 终点, 阵营]、you（自己的阵营编号，旁观为 null）
+        delta   每 send_every 帧一次：frame、balls [编号, 阵营, 数值]（只含变了的）、add / remove 路径
+        result  有阵营占下所有存活的球：winner 为阵营编号，之后直接换下一关并发新的 state
+        error   命令不合法，message 为原因
+        sync    自测时用：在它之前的消息都已经发出
+
+    python server.py --port 8765
+    python server.py --loopback 24 --seconds 10    # 本机起 24 局，每局两个机器人客户端，最后核对状态
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+from engine import Engine, Path
+
+ADMINS = ("wsc",)  # 可以操作任意球，和前端的 admin_list 一样
+
+
+def encode(msg):
+    return (json.dumps(msg, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class Connection:
+    def __init__(self, writer, max_buffer):
+        self.writer = writer
+        self.max_buffer = max_buffer
+        self.account = ""
+        self.match = None
+        self.camp = None
+        self.bytes_sent = 0
+        self.closed = False
+
+    def send(self, data):
+        """发一条已编码的消息；对方收得太慢、积压超过 max_buffer 时断开，不拖累其它连接"""
+        if self.closed:
+            return
+        if self.writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.close()
+            return
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class Match:
+    """一局对局和连在上面的客户端"""
+
+    def __init__(self, name, camp_count=2, seed=None):
+        self.name = name
+        self.engine = Engine(seed=seed, camp_count=camp_count)
+        self.engine.autoplay = True  # 没人占的阵营（包括蓝色）都交给 AI
+        self.camp_ids = self.engine.projectiles.camp_ids
+        self.clients = {}  # Connection -> 阵营（旁观为 None）
+        self.mark()
+
+    def mark(self):
+        """记下客户端已经知道的状态，之后的 delta 和它比"""
+        balls = self.engine.balls
+        self.sent_camps = np.fromiter((self.camp_ids[b.camp] for b in balls), dtype=np.int16, count=len(balls))
+        self.sent_values = np.fromiter((b.value for b in balls), dtype=np.int64, count=len(balls))
+        self.sent_paths = self.path_keys()
+
+    def path_keys(self):
+        return {(p.start_idx, p.end_idx, self.camp_ids[p.camp]) for p in self.engine.paths}
+
+    def full_state(self, camp):
+        engine = self.engine
+        return {
+            "type": "state",
+            "match": self.name,
+            "frame": engine.frame_count,
+            "level": engine.level,
+            "camps": [[c.name, list(c.color)] for c in engine.camps],
+            "balls": [[b.pos[0], b.pos[1], b.radius, self.camp_ids[b.camp], b.value] for b in engine.balls],
+            "paths": sorted(self.path_keys()),
+            "you": None if camp is None else self.camp_ids[camp],
+        }
+
+    def delta(self):
+        """和上次发出去的状态比，返回 delta 消息；什么都没变返回 None"""
+        balls = self.engine.balls
+        camps = np.fromiter((self.camp_ids[b.camp] for b in balls), dtype=np.int16, count=len(balls))
+        values = np.fromiter((b.value for b in balls), dtype=np.int64, count=len(balls))
+        changed = np.flatnonzero((camps != self.sent_camps) | (values != self.sent_values)).tolist()
+        paths = self.path_keys()
+        added = sorted(paths - self.sent_paths)
+        removed = sorted((a, b) for a, b, _ in self.sent_paths - paths)
+        self.sent_camps, self.sent_values, self.sent_paths = camps, values, paths
+        if not changed and not added and not removed:
+            return None
+        return {
+            "type": "delta",
+            "frame": self.engine.frame_count,
+            "balls": [[i, int(camps[i]), int(values[i])] for i in changed],
+            "add": added,
+            "remove": removed,
+        }
+
+    def join(self, conn, account):
+        """按阵营顺序分给第一个没人占的参战阵营，都占满了就旁观"""
+        taken = set(self.clients.values())
+        camp = next((c for c in self.engine.fighting_camps if c not in taken), None)
+        self.clients[conn] = camp
+        conn.match, conn.camp, conn.account = self, camp, account
+        self.engine.ai.set_manual(c for c in self.clients.values() if c is not None)
+        return camp
+
+    def leave(self, conn):
+        self.clients.pop(conn, None)
+        conn.match = conn.camp = None
+        # 走掉的玩家的阵营还给 AI
+        self.engine.ai.set_manual(c for c in self.clients.values() if c is not None)
+
+    def command(self, conn, msg):
+        """执行客户端的路径增删，不合法时返回原因"""
+        engine = self.engine
+        a, b = msg.get("a"), msg.get("b")
+        n = len(engine.balls)
+        # JSON 的 true/false 解析出来是 bool，也是 int 的子类，不能当编号
+        if not (type(a) is int and type(b) is int and 0 <= a < n and 0 <= b < n and a != b):
+            return "球的编号不对"
+        admin = conn.account in ADMINS
+        if msg["type"] == "add":
+            start = engine.balls[a]
+            if not admin and start.camp is not conn.camp:
+                return "只能从自己的球连线"
+            if (a, b) not in engine.paths:
+                engine.paths.add(Path(a, b, f"路径{engine.path_count}({a+1}->{b+1})", start.camp))
+                engine.path_count += 1
+            return None
+        path = engine.paths.get(a, b)
+        if path is not None:
+            if not admin and path.camp is not conn.camp:
+                return "只能删自己的路径"
+            engine.paths.remove(path)
+        return None
+
+    def winner(self):
+        """占下所有存活的球的参战阵营，还没有返回 None"""
+        index = self.engine.camp_index
+        if not index.alive_count:
+            return None
+        for camp in self.engine.fighting_camps:
+            if index.count(camp) == index.alive_count:
+                return camp
+        return None
+
+    def step(self):
+        """推进一帧；分出胜负时返回胜方并直接换下一关（不等结算画面）"""
+        self.engine.update_game_logic()
+        winner = self.winner()
+        if winner is not None:
+            self.engine.next_level()
+        return winner
+
+
+class Server:
+    """tick_rate: 每秒推进几帧；send_every: 每几帧发一次 delta；max_buffer: 单个连接最多积压多少字节"""
+
+    def __init__(self, tick_rate=60, send_every=3, max_buffer=1 << 20, seed=None):
+        self.tick_rate = tick_rate
+        self.send_every = send_every
+        self.max_buffer = max_buffer
+        self.rng = random.Random(seed)
+        self.matches = {}
+        self.connections = set()
+        self.handlers = set()
+        self.frame = 0
+        self.tick_times = deque(maxlen=600)
+        self.late_ticks = 0
+        self.server = None
+        self.ticker = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """开始监听并开始推进，返回实际端口（port 为 0 时由系统分配）"""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.ticker = asyncio.create_task(self.run_ticks())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.ticker.cancel()
+        self.server.close()
+        for conn in list(self.connections):
+            conn.close()
+        # 等各连接的处理协程看到连接关闭后自己退出
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        conn = Connection(writer, self.max_buffer)
+        self.connections.add(conn)
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            while not conn.closed:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # 一行超过 StreamReader 的长度上限：后面的数据已经对不上行了，断开
+                    conn.send(encode({"type": "error", "message": "消息太长"}))
+                    break
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                    kind = msg["type"]
+                except (ValueError, KeyError, TypeError):
+                    conn.send(encode({"type": "error", "message": "消息格式不对"}))
+                    continue
+                error = self.dispatch(conn, kind, msg)
+                if error:
+                    conn.send(encode({"type": "error", "message": error}))
+        except ConnectionError:
+            pass
+        finally:
+            self.handlers.discard(task)
+            self.connections.discard(conn)
+            match = conn.match
+            if match is not None:
+                match.leave(conn)
+                if not match.clients:
+                    del self.matches[match.name]
+            conn.close()
+
+    def dispatch(self, conn, kind, msg):
+        if kind == "join":
+            if conn.match is not None:
+                return "已经在房间里了"
+            name = str(msg.get("match", ""))
+            match = self.matches.get(name)
+            if match is None:
+                try:
+                    camps = int(msg.get("camps", 2))
+                except (TypeError, ValueError):
+                    return "阵营数不对"
+                try:
+                    match = Match(name, camps, seed=self.rng.randrange(2 ** 63))
+                except ValueError as e:
+                    return str(e)
+                self.matches[name] = match
+            camp = match.join(conn, str(msg.get("account", "")))
+            conn.send(encode(match.full_state(camp)))
+            return None
+        if kind in ("add", "remove"):
+            if conn.match is None:
+                return "还没有加入房间"
+            return conn.match.command(conn, msg)
+        return f"不认识的消息类型 {kind}"
+
+    async def run_ticks(self):
+        """固定步长推进所有对局；一帧算超时了就从当前时刻重新计，不补落下的帧"""
+        loop = asyncio.get_running_loop()
+        step = 1 / self.tick_rate
+        deadline = loop.time()
+        while True:
+            start = time.perf_counter()
+            self.tick()
+            self.tick_times.append(time.perf_counter() - start)
+            deadline += step
+            delay = deadline - loop.time()
+            if delay < 0:
+                self.late_ticks += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def tick(self):
+        self.frame += 1
+        send = self.frame % self.send_every == 0
+        for match in list(self.matches.values()):
+            try:
+                winner = match.step()
+            except Exception:
+                # 一局出错只关掉这一局，其它房间照常推进
+                traceback.print_exc()
+                self.drop(match, "对局出错，房间已关闭")
+                continue
+            if winner is not None:
+                self.broadcast(match, encode({"type": "result", "frame": match.engine.frame_count,
+                                              "winner": match.camp_ids[winner]}))
+                for conn, camp in match.clients.items():
+                    conn.send(encode(match.full_state(camp)))
+                match.mark()
+            elif send:
+                self.flush(match)
+
+    def drop(self, match, message):
+        """关掉一局：通知房间里的客户端，让他们回到没加入房间的状态（可以重新 join）"""
+        self.broadcast(match, encode({"type": "error", "message": message}))
+        for conn in list(match.clients):
+            match.leave(conn)
+        self.matches.pop(match.name, None)
+
+    def flush(self, match):
+        msg = match.delta()
+        if msg is not None:
+            self.broadcast(match, encode(msg))
+
+    def broadcast(self, match, data):
+        for conn in list(match.clients):
+            conn.send(data)
+
+    def stats(self):
+        ms = sorted(t * 1000 for t in self.tick_times) or [0.0]
+        return {
+            "matches": len(self.matches),
+            "connections": len(self.connections),
+            "frame": self.frame,
+            "tick_p50_ms": round(statistics.median(ms), 3),
+            "tick_p99_ms": round(ms[int((len(ms) - 1) * 0.99)], 3),
+            "late_ticks": self.late_ticks,
+            "bytes_sent": sum(c.bytes_sent for c in self.connections),
+        }
+
+
+class Client:
+    """联机客户端（测试、机器人用）：收到的 state / delta 应用到本地的镜像上"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.match = None
+        self.you = None
+        self.frame = 0
+        self.balls = []  # [x, y, 半径, 阵营, 数值]
+        self.paths = {}  # (起点, 终点) -> 阵营
+        self.results = []
+        self.errors = []
+        self.bytes_received = 0
+
+    async def connect(self, host="127.0.0.1", port=8765):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    def send(self, **msg):
+        self.writer.write(encode(msg))
+
+    async def join(self, match, account="", camps=2):
+        self.send(type="join", match=match, account=account, camps=camps)
+        while (await self.recv())["type"] != "state":
+            pass
+
+    def add_path(self, a, b):
+        self.send(type="add", a=a, b=b)
+
+    def remove_path(self, a, b):
+        self.send(type="remove", a=a, b=b)
+
+    async def recv(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("服务器断开了")
+        self.bytes_received += len(line)
+        msg = json.loads(line)
+        self.apply(msg)
+        return msg
+
+    def apply(self, msg):
+        kind = msg["type"]
+        if kind == "state":
+            self.match = msg["match"]
+            self.you = msg["you"]
+            self.frame = msg["frame"]
+            self.balls = msg["balls"]
+            self.paths = {(a, b): camp for a, b, camp in msg["paths"]}
+        elif kind == "delta":
+            self.frame = msg["frame"]
+            for i, camp, value in msg["balls"]:
+                self.balls[i][3] = camp
+                self.balls[i][4] = value
+            for a, b in msg["remove"]:
+                self.paths.pop((a, b), None)
+            for a, b, camp in msg["add"]:
+                self.paths[(a, b)] = camp
+        elif kind == "result":
+            self.results.append(msg["winner"])
+        elif kind == "error":
+            self.errors.append(msg["message"])
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def bot(client, rng, interval=1.0):
+    """最简单的机器人：每隔 interval 秒从自己的一个球连到随机一个别的球，偶尔删掉一条自己的路径"""
+    async def listen():
+        while True:
+            await client.recv()
+
+    listener = asyncio.create_task(listen())
+    try:
+        while True:
+            await asyncio.sleep(interval * (0.5 + rng.random()))
+            mine = [i for i, ball in enumerate(client.balls) if ball[3] == client.you and ball[4] > 0]
+            if not mine:
+                continue
+            if client.paths and rng.random() < 0.3:
+                own = [key for key, camp in client.paths.items() if camp == client.you]
+                if own:
+                    client.remove_path(*rng.choice(own))
+                    continue
+            a = rng.choice(mine)
+            b = rng.randrange(len(client.balls))
+            if a != b:
+                client.add_path(a, b)
+    finally:
+        listener.cancel()
+
+
+async def loopback(n_matches, seconds, camps=2, tick_rate=60, send_every=3, seed=0):
+    """本机起服务器和 n_matches * camps 个机器人客户端，跑 seconds 秒；返回 (统计, 镜像不一致的客户端数)"""
+    server = Server(tick_rate, send_every, seed=seed)
+    port = await server.start("127.0.0.1", 0)
+    rng = random.Random(seed)
+    clients = []
+    for m in range(n_matches):
+        for _ in range(camps):
+            client = Client()
+            await client.connect("127.0.0.1", port)
+            await client.join(f"房间{m}", account=f"bot{len(clients)}", camps=camps)
+            clients.append(client)
+    bots = [asyncio.create_task(bot(c, random.Random(rng.random()))) for c in clients]
+    await asyncio.sleep(seconds)
+    for task in bots:
+        task.cancel()
+    await asyncio.gather(*bots, return_exceptions=True)
+    await asyncio.sleep(0.2)  # 让路上的命令先到
+    # 停下推进，把最后的变化发出去，等客户端收完再核对镜像
+    server.ticker.cancel()
+    stats = server.stats()
+    for match in server.matches.values():
+        server.flush(match)
+        server.broadcast(match, encode({"type": "sync"}))
+    for client in clients:
+        while (await client.recv())["type"] != "sync":
+            pass
+    mismatched = 0
+    for client in clients:
+        state = server.matches[client.match].full_state(None)
+        if (client.balls != state["balls"]
+                or client.paths != {(a, b): camp for a, b, camp in state["paths"]}):
+            mismatched += 1
+    stats["bytes_received"] = sum(c.bytes_received for c in clients)
+    stats["full_state_bytes"] = sum(len(encode(m.full_state(None))) for m in server.matches.values())
+    stats["results"] = sum(len(c.results) for c in clients)
+    stats["errors"] = sum(len(c.errors) for c in clients)
+    for client in clients:
+        await client.close()
+    await server.close()
+    return stats, mismatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="联机服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tick-rate", type=int, default=60, help="每秒推进几帧")
+    parser.add_argument("--send-every", type=int, default=3, help="每几帧发一次 delta")
+    parser.add_argument("--loopback", type=int, metavar="N", help="不对外监听，本机跑 N 局机器人对局做自测")
+    parser.add_argument("--seconds", type=float, default=10, help="自测跑多少秒")
+    parser.add_argument("--camps", type=int, default=2, help="自测每局的参战阵营数（每个阵营一个机器人）")
+    args = parser.parse_args(argv)
+
+    if args.loopback:
+        stats, mismatched = asyncio.run(loopback(args.loopback, args.seconds, args.camps,
+                                                 args.tick_rate, args.send_every))
+        for key, value in stats.items():
+            print(f"{key:18s} {value}")
+        print("镜像一致" if not mismatched else f"{mismatched} 个客户端的镜像和服务器不一致")
+        return
+
+    async def serve():
+        server = Server(args.tick_rate, args.send_every)
+        port = await server.start(args.host, args.port)
+        print(f"监听 {args.host}:{port}")
+        while True:
+            await asyncio.sleep(10)
+            print(server.stats())
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
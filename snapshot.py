@@ -0,0 +1,197 @@
+"""整局状态的快照：打包成一段紧凑的 bytes（不 pickle 任何对象），可以随时恢复或分叉
+
+快照是不可变的 bytes，存一份可以反复 restore / fork 出任意多个独立的对局，
+恢复时只拷贝数组，不需要深拷贝球、路径这些对象。
+
+    data = snapshot(engine)
+    other = fork(data)          # 新的一局，从同一状态继续
+    restore(engine, data)       # 原地回到快照时的状态
+"""
+import struct
+
+import numpy as np
+
+from engine import Ball, Engine, Path
+
+MAGIC = b"BSNP"
+VERSION = 5  # 5：加上场地大小和每个阵营的球数
+HEADER = struct.Struct("<4sBqqiiHBBBqiidHIIHHHH")
+RNG = struct.Struct("<B625I?d")
+GROWTH_RNG = struct.Struct("<16s16s?I")
+AI_ENTRY = struct.Struct("<Bq")
+
+FLAG_AI = 1
+FLAG_AUTOPLAY = 2
+FLAG_AI_ADD_TIME = 4
+FLAG_STREAMS = 8
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot(engine):
+    """把一局的完整状态打包成 bytes"""
+    camp_ids = engine.projectiles.camp_ids
+    balls = engine.balls
+    paths = list(engine.paths)
+    store = engine.projectiles
+    store.compact()
+    n = store.count
+    flags = ((FLAG_AI if engine.ai_enabled else 0)
+             | (FLAG_AUTOPLAY if engine.autoplay else 0)
+             | (FLAG_AI_ADD_TIME if engine.last_ai_add_time is not None else 0)
+             | (FLAG_STREAMS if engine.cancel_mode == "streams" else 0))
+    ai_times = engine.ai.last_action_time
+    parts = [HEADER.pack(
+        MAGIC, VERSION, engine.seed, engine.frame_count, engine.level, engine.path_count,
+        engine.cancel_interval, camp_ids[engine.player_camp], engine.camp_count, flags, engine.last_ai_add_time or 0,
+        engine.grow_max, engine.cooldown_frames, engine.shoot_speed_factor,
+        len(balls), len(paths), n, len(ai_times), engine.width, engine.height, engine.camp_balls,
+    )]
+    # 球
+    parts.append(np.array([b.pos for b in balls], dtype=np.float64).tobytes())
+    parts.append(np.array([b.radius for b in balls], dtype=np.int32).tobytes())
+    parts.append(np.array([camp_ids[b.camp] for b in balls], dtype=np.uint8).tobytes())
+    parts.append(np.array([b.value for b in balls], dtype=np.int64).tobytes())
+    # 增长计时
+    growth = engine.growth
+    parts.append(growth.last_add10_time.astype(np.int64).tobytes())
+    parts.append(growth.add10_prob.astype(np.float64).tobytes())
+    # 路径
+    parts.append(np.array([(p.start_idx, p.end_idx) for p in paths], dtype=np.uint16).tobytes())
+    parts.append(np.array([camp_ids[p.camp] for p in paths], dtype=np.uint8).tobytes())
+    parts.append(np.array([p.last_shot_frame for p in paths], dtype=np.int64).tobytes())
+    names = "\0".join(p.name for p in paths).encode("utf-8")
+    parts.append(struct.pack("<I", len(names)) + names)
+    # 飞行中的小球
+    parts.append(struct.pack("<q", store.tick))
+    parts.append(store.origin[:n].tobytes())
+    parts.append(store.vel[:n].tobytes())
+    parts.append(store.launch[:n].tobytes())
+    parts.append(store.arrive[:n].tobytes())
+    parts.append(store.target[:n].tobytes())
+    parts.append(store.camp[:n].tobytes())
+    # AI 冷却
+    for camp, t in ai_times.items():
+        parts.append(AI_ENTRY.pack(camp_ids[camp], t))
+    # 随机数状态
+    version, state, gauss = engine.rng.getstate()
+    parts.append(RNG.pack(version, *state, gauss is not None, gauss or 0.0))
+    g_state, g_inc, has_uint32, uinteger = growth.get_rng_state()
+    parts.append(GROWTH_RNG.pack(g_state.to_bytes(16, "little"), g_inc.to_bytes(16, "little"), has_uint32, uinteger))
+    return b"".join(parts)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def array(self, dtype, count, shape=None):
+        arr = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += arr.nbytes
+        return arr.reshape(shape) if shape is not None else arr
+
+    def unpack(self, st):
+        values = st.unpack_from(self.data, self.offset)
+        self.offset += st.size
+        return values
+
+
+def restore(engine, data):
+    """把 engine 原地恢复到快照时的状态（录像器、路径监听等外部挂件保持不动）"""
+    r = _Reader(data)
+    (magic, version, seed, frame_count, level, path_count, cancel_interval, player_camp, camp_count, flags,
+     last_ai_add_time, grow_max, cooldown_frames, shoot_speed_factor,
+     n_balls, n_paths, n_proj, n_ai, width, height, camp_balls) = r.unpack(HEADER)
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotError("不是快照数据或版本不对")
+    camps = engine.camps
+    engine.seed = seed
+    engine.frame_count = frame_count
+    engine.level = level
+    engine.path_count = path_count
+    engine.cancel_interval = cancel_interval
+    engine.player_camp = camps[player_camp]
+    engine.camp_count = camp_count
+    engine.width = width
+    engine.height = height
+    engine.camp_balls = camp_balls
+    engine.gray_count = n_balls - camp_balls * camp_count
+    engine.ai_enabled = bool(flags & FLAG_AI)
+    engine.autoplay = bool(flags & FLAG_AUTOPLAY)
+    engine.last_ai_add_time = last_ai_add_time if flags & FLAG_AI_ADD_TIME else None
+    engine.grow_max = grow_max
+    engine.cooldown_frames = cooldown_frames
+    engine.shoot_speed_factor = shoot_speed_factor
+
+    # 球：数量相同就复用原来的对象，位置没变就不用重建距离表
+    pos = r.array(np.float64, n_balls * 2, (n_balls, 2))
+    radius = r.array(np.int32, n_balls).tolist()
+    ball_camps = r.array(np.uint8, n_balls).tolist()
+    values = r.array(np.int64, n_balls).tolist()
+    moved = len(engine.balls) != n_balls or not np.array_equal(
+        pos, np.array([b.pos for b in engine.balls], dtype=np.float64).reshape(-1, 2))
+    if len(engine.balls) != n_balls:
+        engine.balls = [Ball((0, 0), camps[0]) for _ in range(n_balls)]
+    for i, (ball, xy) in enumerate(zip(engine.balls, pos.tolist())):
+        ball.idx = i
+        ball.pos = [int(v) if v.is_integer() else v for v in xy]
+        ball.radius = radius[i]
+        ball._camp = camps[ball_camps[i]]
+        ball._value = values[i]
+    engine.camp_index.rebuild(engine.balls)
+    if moved:
+        engine.distances.rebuild(engine.balls)
+
+    growth = engine.growth
+    growth.last_add10_time = r.array(np.int64, n_balls).copy()
+    growth.add10_prob = r.array(np.float64, n_balls).copy()
+
+    keys = r.array(np.uint16, n_paths * 2, (n_paths, 2)).tolist()
+    path_camps = r.array(np.uint8, n_paths).tolist()
+    shots = r.array(np.int64, n_paths).tolist()
+    (name_len,) = r.unpack(struct.Struct("<I"))
+    names = r.data[r.offset:r.offset + name_len].decode("utf-8").split("\0") if n_paths else []
+    r.offset += name_len
+    paths = []
+    for (start, end), camp, shot, name in zip(keys, path_camps, shots, names):
+        path = Path(start, end, name, camps[camp])
+        path.last_shot_frame = shot
+        paths.append(path)
+    engine.paths.load(paths)
+
+    (tick,) = r.unpack(struct.Struct("<q"))
+    engine.projectiles.load(
+        r.array(np.float64, n_proj * 2, (n_proj, 2)),
+        r.array(np.float64, n_proj * 2, (n_proj, 2)),
+        r.array(np.int64, n_proj),
+        r.array(np.int64, n_proj),
+        r.array(np.int32, n_proj),
+        r.array(np.int16, n_proj),
+        tick,
+    )
+    # 按路径的抵消状态不进快照，按恢复出来的小球重建
+    engine.cancel_mode = "streams" if flags & FLAG_STREAMS else "grid"
+    if engine.cancel_mode == "streams":
+        engine.streams.rebuild()
+    else:
+        engine.streams.clear()
+
+    engine.ai.last_action_time = {}
+    for _ in range(n_ai):
+        camp, t = r.unpack(AI_ENTRY)
+        engine.ai.last_action_time[camps[camp]] = t
+    engine.ai.reschedule()
+
+    rng = r.unpack(RNG)
+    engine.rng.setstate((rng[0], tuple(rng[1:626]), rng[627] if rng[626] else None))
+    g_state, g_inc, has_uint32, uinteger = r.unpack(GROWTH_RNG)
+    growth.set_rng_state(int.from_bytes(g_state, "little"), int.from_bytes(g_inc, "little"), int(has_uint32), uinteger)
+    return engine
+
+
+def fork(data):
+    """从快照分叉出一局新的、互不影响的对局（按帧计时）"""
+    return restore(Engine(seed=0, layout=False), data)  # 地图马上被快照覆盖，不用生成
@@ -0,0 +1,330 @@
+"""按路径成批计算的相遇抵消（Engine.cancel_mode = "streams"）
+
+同一条路径上发出的小球出发点、方向、飞行帧数都一样，按发射顺序排成一条"流"。
+两条异阵营的流里各取一个小球，它们第几帧相距小于 R 只取决于两者发射帧之差 d = la - lb：
+a 飞了 k 帧时两者相距 |A + u*k - B - v*(k + d)|，k 取两者都还在飞的整数帧。
+对穿、交叉、擦肩而过、一条进球一条出球、一起飞向同一个球都是这一种算法，
+所以流对的几何就是一张表：d 在 [lo, hi] 内时第一次相距小于 R 是 a 飞了几帧（-1 为这一对擦过去没碰上）。
+两条线段最近距离都不小于 R 的流对不会相遇，不建表。
+流对的几何第一次出现时算好并缓存。
+每个流对比较完队首后算出下一次相遇的帧，按帧号放进堆里，到时候才再看它；
+一方没有小球的流对挂在那条流上，等它发射新的小球再唤醒。
+所以每帧的开销只和当帧到期的流对数、抵消数有关，和流对总数、飞行中的小球总数无关。
+"""
+import bisect
+import heapq
+import math
+
+import numpy as np
+
+from projectiles import flight_ticks
+
+
+class Stream:
+    """一条路径上已发射的小球，按发射顺序存 (编号, 发射帧)"""
+
+    def __init__(self, key, origin, vel, flight):
+        self.key = key  # (起点, 终点, 阵营编号)
+        self.origin = origin
+        self.vel = vel
+        self.flight = flight  # 从发射到进入目标球的帧数
+        self.uids = []
+        self.launches = []
+        self.base = 0  # 已经从前面裁掉的个数，下标都是算上裁掉部分的全局下标
+        self.pairs = []
+        self.waiting = []  # 因为这条流没有小球而停下的流对
+
+    @property
+    def end(self):
+        return self.base + len(self.uids)
+
+    def trim(self, tick):
+        """裁掉已经到达目标的小球，返回它们的编号"""
+        launches = self.launches
+        n = bisect.bisect_left(launches, tick - self.flight)
+        if n == 0:
+            return []
+        dropped = self.uids[:n]
+        del self.uids[:n]
+        del launches[:n]
+        self.base += n
+        for pair in self.pairs:
+            if pair.a is self:
+                pair.ia = max(pair.ia, self.base)
+            else:
+                pair.ib = max(pair.ib, self.base)
+        return dropped
+
+
+class StreamPair:
+    """两条可能相遇的异阵营流，ia / ib 为各自下一个待比较的小球"""
+
+    def __init__(self, a, b, lo, hi, ages):
+        self.a = a
+        self.b = b
+        self.key = (a.key, b.key)
+        self.lo = lo      # 发射帧之差 la - lb 在 [lo, hi] 内才可能相遇
+        self.hi = hi
+        self.ages = ages  # ages[d - lo]：相遇时 a 飞了几帧，-1 表示这一对不会相遇
+        self.ia = a.base
+        self.ib = b.base
+        self.when = None  # 排在哪一帧处理，None 表示在等某条流发射
+        self.seq = 0      # 堆里只有 seq 相同的那条记录有效
+
+
+def segment_distance(p, p2, q, q2):
+    """线段 p-p2 和 q-q2 的最近距离"""
+    def point_segment(x, s, e):
+        dx, dy = e[0] - s[0], e[1] - s[1]
+        ll = dx * dx + dy * dy
+        k = 0.0 if ll == 0 else min(1.0, max(0.0, ((x[0] - s[0]) * dx + (x[1] - s[1]) * dy) / ll))
+        return math.hypot(x[0] - s[0] - k * dx, x[1] - s[1] - k * dy)
+
+    def side(x, s, e):
+        return (e[0] - s[0]) * (x[1] - s[1]) - (e[1] - s[1]) * (x[0] - s[0])
+
+    if side(q, p, p2) * side(q2, p, p2) < 0 and side(p, q, q2) * side(p2, q, q2) < 0:
+        return 0.0
+    return min(point_segment(p, q, q2), point_segment(p2, q, q2),
+               point_segment(q, p, p2), point_segment(q2, p, p2))
+
+
+def pair_geometry(a, b, radius):
+    """两条流的相遇表 (lo, hi, ages)，见模块说明；不会相遇返回 None
+
+    小球飞了 0 ~ flight-1 帧时还在场上（飞满 flight 帧的那一帧先结算到达），只在这些整数帧上比较距离，
+    和网格抵消每帧检测时看到的位置一样。
+    """
+    (ax, ay), (ux, uy) = a.origin, a.vel
+    (bx, by), (vx, vy) = b.origin, b.vel
+    fa, fb = a.flight - 1, b.flight - 1
+    if segment_distance((ax, ay), (ax + ux * fa, ay + uy * fa),
+                        (bx, by), (bx + vx * fb, by + vy * fb)) >= radius:
+        return None
+    d = np.arange(-fa, fb + 1, dtype=np.float64)
+    # a 飞了 k 帧时两者的相对位置 P + r*k，P = A - B - v*d，r = u - v
+    px, py = ax - bx - vx * d, ay - by - vy * d
+    rx, ry = ux - vx, uy - vy
+    rr = rx * rx + ry * ry
+    lower = np.maximum(0.0, -d)
+    upper = np.minimum(fa, fb - d)
+    c = px * px + py * py - radius * radius
+    if rr < 1e-12:
+        # 同向平行：距离不变
+        first = np.where(c < 0, lower, np.inf)
+    else:
+        half = px * rx + py * ry
+        disc = half * half - rr * c
+        root = np.sqrt(np.maximum(disc, 0.0))
+        first = np.where(disc > 0, np.floor((-half - root) / rr) + 1, np.inf)
+    found = np.isfinite(first)
+    first = np.where(found, np.maximum(first, lower), lower)
+
+    def within(k):
+        # 和网格抵消一样先算出两个小球的位置再比距离，正好相距 R 时两边的判断才一致
+        return np.hypot(ax + ux * k - (bx + vx * (k + d)), ay + uy * k - (by + vy * (k + d))) < radius
+
+    # 解方程得到的帧在浮点误差下可能差一帧，在前后两个整数帧上核对
+    back = found & (first - 1 >= lower) & within(first - 1)
+    first = np.where(back, first - 1, first)
+    first = np.where(found & ~back & ~within(first), first + 1, first)
+    ok = found & (first <= upper) & within(first)
+    hits = np.flatnonzero(ok)
+    if len(hits) == 0:
+        return None
+    i, j = int(hits[0]), int(hits[-1])
+    ages = np.where(ok[i:j + 1], first[i:j + 1], -1).astype(np.int64).tolist()
+    return i - fa, j - fa, ages
+
+
+class StreamCanceller:
+    """按流对计算相遇抵消，结果通过 ProjectileStore.kill 生效"""
+
+    def __init__(self, engine, radius=10, trim_interval=60):
+        self.engine = engine
+        self.radius = radius
+        self.trim_interval = trim_interval
+        self.clear()
+
+    def clear(self):
+        self.streams = {}
+        self.pairs = {}
+        self.geometry = {}
+        self.cancelled = set()
+        self.due = []  # (帧号, 流对键, seq)
+        self.seq = 0
+
+    def launch(self, start, end, camp, vel, uid, tick):
+        key = (start, end, self.engine.projectiles.camp_ids[camp])
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self._open(key, vel, tick + 1)
+        stream.uids.append(uid)
+        stream.launches.append(tick)
+        if stream.waiting:
+            for pair in stream.waiting:
+                if self.pairs.get(pair.key) is pair:
+                    self._schedule(pair, tick + 1)
+            stream.waiting = []
+
+    def _schedule(self, pair, tick):
+        """让流对在第 tick 帧处理；已经排在更早的帧就不动"""
+        if pair.when is not None and pair.when <= tick:
+            return
+        self.seq += 1
+        pair.seq = self.seq
+        pair.when = tick
+        heapq.heappush(self.due, (tick, pair.key, self.seq))
+
+    def _open(self, key, vel, tick):
+        balls = self.engine.balls
+        start, end = balls[key[0]], balls[key[1]]
+        stream = Stream(key, tuple(start.pos), tuple(vel), flight_ticks(start.pos, vel, end.pos, end.radius))
+        self.streams[key] = stream
+        for other in list(self.streams.values()):
+            if other.key[2] == key[2]:
+                continue
+            a, b = (stream, other) if key < other.key else (other, stream)
+            gkey = (a.key, b.key)
+            if gkey not in self.geometry:
+                self.geometry[gkey] = pair_geometry(a, b, self.radius)
+            geom = self.geometry[gkey]
+            if geom is None:
+                continue
+            pair = StreamPair(a, b, *geom)
+            self.pairs[gkey] = pair
+            a.pairs.append(pair)
+            b.pairs.append(pair)
+            self._schedule(pair, tick)
+        return stream
+
+    def _close(self, stream):
+        del self.streams[stream.key]
+        for pair in stream.pairs:
+            del self.pairs[pair.key]
+            other = pair.b if pair.a is stream else pair.a
+            other.pairs.remove(pair)
+
+    def update(self, tick):
+        """处理第 tick 帧以前发生的所有相遇（在结算到达之前调用）
+
+        到期的流对按键的顺序处理；某个流对抵消掉的小球如果正好是别的流对的队首，那个流对要重看：
+        键排在后面的这一帧接着处理，排在前面的下一帧处理。
+        """
+        due = self.due
+        work = []
+        while due and due[0][0] <= tick:
+            _, gkey, seq = heapq.heappop(due)
+            pair = self.pairs.get(gkey)
+            if pair is not None and pair.seq == seq:
+                pair.when = tick
+                work.append(gkey)
+        heapq.heapify(work)
+        killed = []
+        fronts = []
+        while work:
+            gkey = heapq.heappop(work)
+            pair = self.pairs[gkey]
+            pair.when = None
+            nxt = self._match(pair, tick, killed, fronts)
+            if nxt is not None:
+                self._schedule(pair, nxt)
+            while fronts:
+                index = fronts.pop()
+                stream = fronts.pop()
+                for other in stream.pairs:
+                    if other is pair or other.when == tick:
+                        continue
+                    if (other.ia if other.a is stream else other.ib) != index:
+                        continue
+                    if other.key > gkey:
+                        self.seq += 1
+                        other.seq = self.seq
+                        other.when = tick
+                        heapq.heappush(work, other.key)
+                    else:
+                        self._schedule(other, tick + 1)
+        if killed:
+            self.engine.projectiles.kill(killed)
+        if tick % self.trim_interval == 0:
+            for stream in list(self.streams.values()):
+                self.cancelled.difference_update(stream.trim(tick))
+                if not stream.uids:
+                    self._close(stream)
+
+    def _match(self, pair, tick, killed, fronts):
+        """按发射顺序比较两条流的队首，抵消到期的；返回下一次要看的帧，没有对手时返回 None
+
+        抵消掉的小球编号加进 killed，(流, 全局下标) 加进 fronts
+        """
+        a, b = pair.a, pair.b
+        nxt = None
+        ia, ib = pair.ia, pair.ib
+        cancelled = self.cancelled
+        while True:
+            # 跳过已经到达或已经抵消的
+            while ia < a.end and (a.launches[ia - a.base] + a.flight < tick or a.uids[ia - a.base] in cancelled):
+                ia += 1
+            while ib < b.end and (b.launches[ib - b.base] + b.flight < tick or b.uids[ib - b.base] in cancelled):
+                ib += 1
+            if ia == a.end or ib == b.end:
+                if ia == a.end:
+                    a.waiting.append(pair)
+                if ib == b.end:
+                    b.waiting.append(pair)
+                break
+            la = a.launches[ia - a.base]
+            lb = b.launches[ib - b.base]
+            d = la - lb
+            # 后面发射的小球只会让 d 往一个方向走：a 发射得太早，b 后面的小球只会更晚，a 已经碰不上了
+            if d < pair.lo:
+                ia += 1
+                continue
+            if d > pair.hi:
+                ib += 1
+                continue
+            age = pair.ages[d - pair.lo]
+            if age < 0:
+                # 擦过去没碰上（只出现在表的两头附近），按靠近哪头跳过对应的一方
+                if d - pair.lo < pair.hi - d:
+                    ia += 1
+                else:
+                    ib += 1
+                continue
+            t = la + age
+            if t > tick:
+                nxt = t
+                break
+            ua = a.uids[ia - a.base]
+            ub = b.uids[ib - b.base]
+            cancelled.add(ua)
+            cancelled.add(ub)
+            killed.append(ua)
+            killed.append(ub)
+            fronts.extend((a, ia, b, ib))
+            ia += 1
+            ib += 1
+        pair.ia, pair.ib = ia, ib
+        return nxt
+
+    def rebuild(self):
+        """按 ProjectileStore 里现存的小球重建所有流（切换模式、恢复快照后调用）"""
+        self.clear()
+        engine = self.engine
+        store = engine.projectiles
+        store.compact()
+        n = store.count
+        starts = {tuple(b.pos): b.idx for b in engine.balls}
+        for origin, vel, uid, launch, target, camp in zip(
+                store.origin[:n].tolist(), store.vel[:n].tolist(), store.uid[:n].tolist(),
+                store.launch[:n].tolist(), store.target[:n].tolist(), store.camp[:n].tolist()):
+            start = starts.get(tuple(origin))
+            if start is not None:
+                self.launch(start, target, store.camps[camp], vel, uid, launch)
+        # 重建出来的流对下一次 update 全部看一遍
+        self.due = []
+        for stream in self.streams.values():
+            stream.waiting = []
+        for pair in self.pairs.values():
+            pair.when = None
+            self._schedule(pair, engine.frame_count)
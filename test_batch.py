@@ -0,0 +1,21 @@
+"""批量对局：同一批种子串行和多进程跑出来的结果一样"""
+from batch import aggregate, make_jobs, play_match, run_batch
+
+
+def test_pool_matches_serial_run():
+    jobs = make_jobs(3, [0, 4], seed=7, max_frames=4000, sample_every=200)
+    serial, _ = run_batch(jobs, workers=1)
+    pooled, _ = run_batch(jobs, workers=2)
+    assert pooled == serial
+    summary = aggregate(serial)
+    assert sorted(summary) == [0, 4]
+    for s in summary.values():
+        assert s["wins"] + s["losses"] + s["timeouts"] == s["matches"] == 3
+
+
+def test_match_is_reproducible():
+    job = make_jobs(1, [2], seed=3, max_frames=3000, sample_every=100, camp_count=3)[0]
+    first = play_match(job)
+    assert play_match(job) == first
+    assert len(first["curves"]) == 4  # 三个阵营加灰色
+    assert all(len(c) == len(first["curves"]["蓝"]) for c in first["curves"].values())
@@ -0,0 +1,30 @@
+"""基准对比：按校准耗时折算，换了运行环境时能看出来"""
+from bench import compare, host_changes
+
+
+def report(calibration, median, **meta):
+    meta = dict({"python": "3.11.7", "numpy": "2.4.6", "machine": "x86_64", "system": "Linux",
+                 "processor": "", "calibration_ms": calibration}, **meta)
+    return {"meta": meta, "results": {"small/step": {"median_ms": median}}}
+
+
+def test_ratios_are_scaled_by_calibration():
+    baseline = report(2.0, 0.10)
+    # 整台机器慢了一倍：毫秒数翻倍，但不算变慢
+    [(_, base, cur, ratio, slower)] = compare(report(4.0, 0.20), baseline)
+    assert (base, cur, round(ratio, 6), slower) == (0.10, 0.20, 1.0, False)
+    # 机器一样快，这一项慢了一半
+    [(_, _, _, ratio, slower)] = compare(report(2.0, 0.15), baseline)
+    assert round(ratio, 6) == 1.5 and slower
+
+
+def test_old_baseline_without_calibration():
+    baseline = report(None, 0.10)
+    [(_, _, _, ratio, slower)] = compare(report(4.0, 0.20), baseline)
+    assert round(ratio, 6) == 2.0 and slower
+
+
+def test_host_changes():
+    baseline = report(2.0, 0.1)
+    assert host_changes(report(2.0, 0.1), baseline) == []
+    assert host_changes(report(2.0, 0.1, numpy="2.5.0"), baseline) == [("numpy", "2.4.6", "2.5.0")]
@@ -0,0 +1,57 @@
+"""训练环境：本进程内和子进程 + 共享内存两种跑法的轨迹完全一样"""
+import numpy as np
+import pytest
+
+from env import ADD, NOOP, REMOVE, BeesEnv, VectorEnv, random_actions
+
+
+def same_info(a, b):
+    a, b = dict(a), dict(b)
+    fa, fb = a.pop("final_observation", None), b.pop("final_observation", None)
+    assert a == b
+    assert (fa is None) == (fb is None)
+    if fa is not None:
+        for key in fa:
+            np.testing.assert_array_equal(fa[key], fb[key])
+
+
+@pytest.mark.parametrize("camps", [2, 3])
+def test_workers_match_in_process(camps):
+    local = VectorEnv(4, workers=0, seed=7, camp_count=camps, max_steps=15)
+    shared = VectorEnv(4, workers=2, seed=7, camp_count=camps, max_steps=15)
+    rng = np.random.default_rng(camps)
+    try:
+        for vec in (local, shared):
+            vec.reset(seed=100)
+        for key in local.buffers:
+            np.testing.assert_array_equal(local.buffers[key], shared.buffers[key])
+        truncated = 0
+        for step in range(40):
+            actions = random_actions(local, local.buffers, rng)
+            a = local.step(actions)
+            b = shared.step(actions)
+            for key in a[0]:
+                np.testing.assert_array_equal(a[0][key], b[0][key], err_msg=f"{step} {key}")
+            for x, y in zip(a[1:4], b[1:4]):
+                np.testing.assert_array_equal(x, y)
+            for x, y in zip(a[4], b[4]):
+                same_info(x, y)
+            truncated += int(a[3].sum())
+        assert truncated  # 要真的自动 reset 过
+    finally:
+        local.close()
+        shared.close()
+
+
+def test_action_round_trip():
+    env = BeesEnv(seed=0)
+    n = env.n_balls
+    assert env.decode_action(env.encode_action(NOOP)) == (NOOP, 0, 0)
+    seen = {0}
+    for kind in (ADD, REMOVE):
+        for a in range(n):
+            for b in range(n):
+                action = env.encode_action(kind, a, b)
+                assert env.decode_action(action) == (kind, a, b)
+                seen.add(action)
+    assert seen == set(range(env.action_count))
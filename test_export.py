@@ -0,0 +1,28 @@
+"""离屏导出：录像没有 END 记录（录制中途断了）时导出到最后一个事件为止（没装 pygame 时跳过）"""
+import os
+import random
+
+import pytest
+
+from conftest import autoplay, scripted
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pytest.importorskip("pygame")
+
+from export import main  # noqa: E402
+from replay import Recorder, Replay  # noqa: E402
+
+
+def test_replay_without_end_record(tmp_path):
+    engine = autoplay(4)
+    recorder = Recorder(engine)
+    scripted(engine, 300, random.Random(2))
+    data = bytes(recorder.buf)  # 没有 finish()，末尾没有 END 记录
+    replay = Replay(data)
+    assert replay.end_tick is None and replay.events
+    path = tmp_path / "cut.bees"
+    path.write_bytes(data)
+    out = tmp_path / "frames"
+    main(["--replay", str(path), "--out", str(out), "--fps", "15", "--workers", "1"])
+    # 第 0 帧起每 4 帧一张，导出到最后一个事件的那一帧（不含）
+    assert len(os.listdir(out)) == len(range(0, replay.last_tick, 4))
@@ -0,0 +1,59 @@
+"""每秒增长：批量计算和逐个球的写法（用同一批随机数）结果一样"""
+import random
+
+import numpy as np
+import pytest
+
+from engine import Ball, Camp, CampIndex
+from growth import ADD10_AFTER, ADD10_BASE, ADD10_STEP, Growth
+
+
+def scalar_step(values, last_add10, prob, ai, r, now_tick, bonus, grow_max):
+    """参考实现：改成数组之前逐个球的循环，第 i 个球用 r[i]"""
+    for i in range(len(values)):
+        if ai[i] and values[i] > 0:
+            values[i] += bonus
+        if values[i] >= grow_max:
+            continue
+        if values[i] > grow_max // 2:
+            if r[i] < 0.3:
+                values[i] += 1
+            continue
+        if now_tick - last_add10[i] >= ADD10_AFTER:
+            seconds_over = (now_tick - last_add10[i] - ADD10_AFTER) // 1000
+            prob[i] = min(ADD10_BASE + ADD10_STEP * seconds_over, 1.0)
+        else:
+            prob[i] = ADD10_BASE
+        if r[i] < 0.5:
+            values[i] += 1
+        elif r[i] < 0.5 + prob[i]:
+            values[i] += 10
+            last_add10[i] = now_tick
+            prob[i] = ADD10_BASE
+
+
+@pytest.mark.parametrize("seed,bonus", [(0, 0), (1, 2), (2, 5)])
+def test_matches_scalar_reference(seed, bonus):
+    rng = random.Random(seed)
+    camps = [Camp("蓝", (0, 0, 255)), Camp("黄", (255, 255, 0)), Camp("灰", (128, 128, 128))]
+    balls = [Ball((0, 0), rng.choice(camps), value=rng.choice([0, 0, 1, 5, 49, 50, 51, 99, 100, 120]))
+             for _ in range(300)]
+    index = CampIndex(balls)
+    growth = Growth(len(balls), 0, seed)
+    draws = np.random.Generator(np.random.PCG64(seed))  # 和 Growth 用同一串随机数
+    values = [b.value for b in balls]
+    last_add10 = [0] * len(balls)
+    prob = [0.0163] * len(balls)
+    ai = [b.camp is camps[1] for b in balls]
+    for second in range(1, 120):
+        now_tick = second * 1000
+        growth.step(balls, index, now_tick, {camps[1]}, bonus, 100)
+        scalar_step(values, last_add10, prob, ai, draws.random(len(balls)), now_tick, bonus, 100)
+        assert [b.value for b in balls] == values, second
+        assert growth.last_add10_time.tolist() == last_add10
+        assert growth.add10_prob.tolist() == pytest.approx(prob)
+    # 批量写回之后阵营统计和从头重建的一样
+    fresh = CampIndex(balls)
+    for camp in camps:
+        assert (index.total(camp), index.count(camp)) == (fresh.total(camp), fresh.count(camp))
+    assert index.alive_count == fresh.alive_count
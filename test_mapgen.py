@@ -0,0 +1,75 @@
+"""地图生成：间距、放不下时报错、同一种子同样的地图；Engine 按给定的场地大小和球数开局"""
+import math
+import random
+
+import pytest
+
+from engine import Engine
+from mapgen import MapError, MapGenerator, sector
+from replay import Recorder, Replay, ReplayPlayer
+from snapshot import fork, snapshot
+
+
+def min_gap(positions):
+    return min(math.dist(p, q) for i, p in enumerate(positions) for q in positions[i + 1:])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_spacing_and_bounds(seed):
+    gen = MapGenerator(1200, 600, radius=30, margin=10, edge=100)
+    positions = gen.generate(random.Random(seed), [(4, "left"), (4, "right"), (9, "uniform")])
+    assert len(positions) == 17
+    assert min_gap(positions) > 70
+    assert all(130 <= x <= 1070 and 130 <= y <= 470 for x, y in positions)
+    assert all(x < 600 for x, _ in positions[:4]) and all(x > 600 for x, _ in positions[4:8])
+
+
+def test_same_seed_same_map():
+    gen = MapGenerator(2400, 1200, radius=30, margin=10, edge=30)
+    groups = [(20, sector(i, 3)) for i in range(3)] + [(150, "uniform")]
+    assert gen.generate(random.Random(5), groups) == gen.generate(random.Random(5), groups)
+    assert gen.generate(random.Random(5), groups) != gen.generate(random.Random(6), groups)
+
+
+def test_overcrowding_raises():
+    gen = MapGenerator(400, 300, radius=30, margin=10, edge=10)
+    with pytest.raises(MapError):
+        gen.generate(random.Random(0), [(200, "uniform")])
+    with pytest.raises(MapError):
+        MapGenerator(100, 100, radius=30, edge=30)
+
+
+def test_fixed_points_keep_spacing():
+    fixed = [(300, 300), (600, 300), (900, 300)]
+    gen = MapGenerator(1200, 600, radius=30, margin=0, edge=30)
+    positions = gen.generate(random.Random(1), [(30, "uniform")], fixed=fixed)
+    assert min(math.dist(p, q) for p in positions for q in fixed) > 60
+
+
+def test_engine_builds_large_boards():
+    board = {"width": 2400, "height": 1200, "camp_balls": 20, "gray_count": 200}
+    engine = Engine(seed=3, camp_count=3, **board)
+    engine.autoplay = True
+    balls = engine.balls
+    assert len(balls) == 260
+    assert [b.camp.name for b in balls[:60:20]] == ["蓝", "黄", "紫"]
+    assert all(b.camp is engine.gray_camp for b in balls[60:])
+    assert all(30 <= b.pos[0] <= 2370 and 30 <= b.pos[1] <= 1170 for b in balls)
+    assert min_gap([b.pos for b in balls]) > 60
+    recorder = Recorder(engine)
+    for _ in range(600):
+        engine.update_game_logic()
+    engine.next_level()
+    assert len(engine.balls) == 260 and min_gap([b.pos for b in engine.balls]) > 70
+    other = fork(snapshot(engine))
+    assert (other.width, other.height, other.camp_balls, other.gray_count) == (2400, 1200, 20, 200)
+    other.next_level()
+    engine.next_level()
+    assert [b.pos for b in other.balls] == [b.pos for b in engine.balls]
+    assert ReplayPlayer(Replay(recorder.finish())).verify()
+
+
+def test_default_board_keeps_the_fixed_opening():
+    engine = Engine(seed=1)
+    assert [tuple(b.pos) for b in engine.balls[:4]] == [(100, 100), (200, 100), (100, 200), (200, 200)]
+    assert len(engine.balls) == 17
@@ -0,0 +1,45 @@
+"""鼠标点选的网格索引和挨个算距离的结果一样"""
+import math
+import random
+
+import pytest
+
+from engine import Engine, Path
+from pick import PickIndex, segment_hit
+
+
+def scan_balls(engine, pos):
+    return [b.idx for b in engine.balls if math.hypot(pos[0] - b.pos[0], pos[1] - b.pos[1]) <= b.radius]
+
+
+def scan_path(engine, pos, tol):
+    balls = engine.balls
+    for path in engine.paths:
+        if segment_hit(pos, balls[path.start_idx].pos, balls[path.end_idx].pos, tol):
+            return path
+    return None
+
+
+@pytest.mark.parametrize("seed,board", [(0, {}), (1, {"width": 1600, "height": 900, "camp_balls": 6}),
+                                        (2, {"width": 800, "height": 500, "gray_count": 4})])
+def test_pick_matches_linear_scan(seed, board):
+    rng = random.Random(seed)
+    engine = Engine(seed=seed, **board)
+    picks = PickIndex(engine)
+    for _ in range(4):
+        n = len(engine.balls)
+        for _ in range(40):
+            a, b = rng.randrange(n), rng.randrange(n)
+            if a != b and (a, b) not in engine.paths:
+                engine.paths.add(Path(a, b, "测试", engine.balls[a].camp))
+        for path in rng.sample(list(engine.paths), len(engine.paths) // 3):
+            engine.paths.remove(path)
+        points = [(rng.uniform(-20, engine.width + 20), rng.uniform(-20, engine.height + 20)) for _ in range(2000)]
+        # 球心附近多取一些点，保证真的点中过球
+        points += [(b.pos[0] + rng.uniform(-b.radius, b.radius), b.pos[1] + rng.uniform(-b.radius, b.radius))
+                   for b in engine.balls]
+        for pos in points:
+            assert picks.balls_at(pos) == scan_balls(engine, pos), pos
+            assert picks.path_at(pos) is scan_path(engine, pos, picks.tol), pos
+        # 换图后球的位置变了，索引要自己重建
+        engine.next_level()
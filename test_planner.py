@@ -0,0 +1,44 @@
+"""前瞻规划：本进程内计算不超过时间上限，不限时的决策可复现"""
+import time
+
+from conftest import autoplay
+from planner import Planner, run_rollout, score
+from snapshot import fork, snapshot
+
+
+def midgame(seed=1, camp_count=2):
+    engine = autoplay(seed, camp_count=camp_count)
+    for _ in range(600):
+        engine.update_game_logic()
+    return engine
+
+
+def test_rollout_gives_up_past_deadline():
+    engine = midgame()
+    scratch = fork(snapshot(engine))
+    start = time.perf_counter()
+    assert run_rollout(scratch, scratch.camps[1], [], 100000, 0, deadline=start + 0.01) is None
+    assert time.perf_counter() - start < 0.05
+    scratch = fork(snapshot(engine))
+    assert run_rollout(scratch, scratch.camps[1], [], 60, 0) == score(scratch, scratch.camps[1])
+
+
+def test_in_process_decision_stays_within_budget():
+    engine = midgame()
+    planner = Planner(engine, horizon=5000, budget_ms=10)
+    camp = engine.camps[1]
+    assert len(planner.candidates(camp)) > 1
+    start = time.perf_counter()
+    planner.act(camp)
+    assert time.perf_counter() - start < 0.05  # 不限时的话一次推演就要一百多毫秒
+
+
+def test_unbudgeted_decisions_are_reproducible():
+    paths = []
+    for _ in range(2):
+        engine = midgame(4, camp_count=3)
+        engine.ai.planner = Planner(engine, horizon=60, rollouts=2, budget_ms=None)
+        for _ in range(300):
+            engine.update_game_logic()
+        paths.append(sorted(p.key for p in engine.paths))
+    assert paths[0] == paths[1]
@@ -0,0 +1,32 @@
+"""性能统计：挂上后按段计时、每秒记一行计数器，导出 CSV"""
+import csv
+
+from conftest import autoplay
+from profiler import Profiler
+
+
+def test_sections_and_counters(tmp_path):
+    engine = autoplay(2)
+    prof = engine.profiler = Profiler()
+    path = tmp_path / "prof.csv"
+    assert not prof.save_csv(path)
+    assert not path.exists()
+    for _ in range(engine.fps * 5):
+        engine.update_game_logic()
+    for name in ("ai", "arrival", "fire", "cancel", "growth", "check"):
+        p50, p99 = prof.percentiles(name)
+        assert 0 <= p50 <= p99
+    assert prof.percentiles("draw") is None  # 前端才记这一段
+    assert prof.save_csv(path)
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row["frame"]) for row in rows] == [engine.fps * i for i in range(1, 6)]
+    assert sum(float(row["arrivals_per_s"]) for row in rows) > 0
+
+
+def test_profiling_does_not_change_the_match():
+    plain, profiled = autoplay(4), autoplay(4)
+    profiled.profiler = Profiler()
+    for _ in range(1200):
+        assert plain.update_game_logic() == profiled.update_game_logic()
+    assert [(b.camp.name, b.value) for b in plain.balls] == [(b.camp.name, b.value) for b in profiled.balls]
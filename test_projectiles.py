@@ -0,0 +1,96 @@
+"""ProjectileStore 和改造前逐个对象的循环对结果"""
+import math
+
+import numpy as np
+import pytest
+
+from conftest import autoplay
+from projectiles import ProjectileStore
+
+
+class ObjectLoop:
+    """参考实现：改成 ProjectileStore 之前的逐个对象循环
+
+    每帧每个小球 pos += vel，挪完就和目标球比距离；抵消时按列表顺序两两比较，互消后删掉这一对。
+    接口和 ProjectileStore 里 Engine 用到的那几个一样，可以直接替换 engine.projectiles。
+    """
+
+    def __init__(self, camps):
+        self.camps = camps
+        self.camp_ids = {camp: i for i, camp in enumerate(camps)}
+        self.shots = []  # [pos, vel, 目标球编号, 阵营]
+
+    def __len__(self):
+        return len(self.shots)
+
+    def clear(self):
+        self.shots = []
+
+    def spawn(self, pos, vel, target, camp):
+        self.shots.append([list(pos), list(vel), target.idx, camp])
+        return len(self.shots)
+
+    def step(self, balls, tick):
+        for shot in self.shots[:]:
+            pos, vel, end_idx, camp = shot
+            pos[0] += vel[0]
+            pos[1] += vel[1]
+            target = balls[end_idx]
+            if math.hypot(pos[0] - target.pos[0], pos[1] - target.pos[1]) <= target.radius:
+                if target.value == 0:
+                    target.camp = camp
+                    target.value = 1
+                elif camp == target.camp:
+                    target.value += 1
+                else:
+                    target.value -= 1
+                self.shots.remove(shot)
+
+    def cancel(self, radius=10):
+        shots = self.shots
+        i = 0
+        while i < len(shots):
+            for j in range(i + 1, len(shots)):
+                p1, p2 = shots[i], shots[j]
+                if p1[3] != p2[3] and math.hypot(p1[0][0] - p2[0][0], p1[0][1] - p2[0][1]) < radius:
+                    del shots[j]
+                    del shots[i]
+                    break
+            else:
+                i += 1
+
+
+def ball_states(engine):
+    return [(ball.camp.name, ball.value) for ball in engine.balls]
+
+
+@pytest.mark.parametrize("seed,level", [(1, 0), (2, 0), (3, 7)])
+def test_store_matches_object_loop(seed, level):
+    store = autoplay(seed)
+    ref = autoplay(seed)
+    ref.projectiles = ObjectLoop(ref.camps)
+    for engine in (store, ref):
+        if level:
+            engine.level = level
+            engine.randomize_balls()
+    for f in range(3000):
+        a = store.update_game_logic()
+        b = ref.update_game_logic()
+        assert (ball_states(store), len(store.projectiles), a) == (ball_states(ref), len(ref.projectiles), b), f
+        if a is not None:
+            break
+    assert store.projectiles.cancel_count > 0  # 要真的发生过抵消，才比得出抵消的结果
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_close_pairs_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = 400
+    pos = rng.uniform(-50, 300, (n, 2))
+    if seed % 2:
+        pos = np.round(pos / 10) * 10  # 正好落在格子边上
+    camp = rng.integers(0, 3, n).astype(np.int16)
+    ii, jj = ProjectileStore._close_pairs(pos, camp, 10)
+    expected = {(i, j) for i in range(n) for j in range(i + 1, n)
+                if camp[i] != camp[j] and math.hypot(*(pos[i] - pos[j])) < 10}
+    assert sorted(zip(ii.tolist(), jj.tolist())) == sorted(expected)
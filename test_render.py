@@ -0,0 +1,28 @@
+"""只重画脏区域的画面和每帧整屏重画的一样（没装 pygame 时跳过）"""
+import os
+
+import pytest
+
+from conftest import autoplay
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from render import Renderer, load_font  # noqa: E402
+
+
+def test_incremental_frames_match_full_redraw():
+    pygame.font.init()
+    font = load_font(24)
+    engine = autoplay(3)
+    a, b = pygame.Surface((1200, 600)), pygame.Surface((1200, 600))
+    incremental, full = Renderer(a, font), Renderer(b, font)
+    for f in range(1500):
+        engine.update_game_logic()
+        hud = [(f"第{f % 7}帧", (10, 10))]
+        incremental.draw(engine, hud)
+        incremental.finish()
+        full.invalidate()
+        full.draw(engine, hud)
+        if f % 25 == 0:
+            assert pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB"), f
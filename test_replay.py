@@ -0,0 +1,28 @@
+"""录像：回放校验通过，往回跳能还原录制时的状态"""
+import random
+
+import pytest
+
+from conftest import autoplay, scripted
+from replay import Recorder, Replay, ReplayPlayer, state_digest
+
+
+@pytest.mark.parametrize("mode", ["grid", "streams"])
+def test_verify_and_seek(mode):
+    engine = autoplay(11, mode)
+    recorder = Recorder(engine)
+    # seek(t) 的状态包括第 t 帧 AI 的操作，所以在 AI 操作完时取摘要
+    digests = []
+    ai_update = engine.ai.update
+
+    def update():
+        ai_update()
+        digests.append(state_digest(engine))
+
+    engine.ai.update = update
+    scripted(engine, 4000, random.Random(5))
+    player = ReplayPlayer(Replay(recorder.finish()))
+    assert player.verify()
+    for tick in (3000, 1200, 2999, 0):
+        player.seek(tick)
+        assert state_digest(player.engine) == digests[tick]
@@ -0,0 +1,70 @@
+"""联机服务器：客户端的镜像和服务器上的对局一致，不合法的命令被拒绝"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from server import Client, Match, Server, loopback
+
+
+@pytest.mark.parametrize("camps", [2, 3])
+def test_loopback_mirrors_match_engine(camps):
+    stats, mismatched = asyncio.run(loopback(2, 1.5, camps=camps, seed=camps))
+    assert mismatched == 0
+    assert stats["matches"] == 2 and stats["bytes_received"] > 0
+
+
+@pytest.mark.parametrize("a,b", [(True, 2), (3, False), ("0", 1), (0, 1.0), (None, 1), (0, 0), (-1, 1), (0, 10 ** 6)])
+def test_command_rejects_bad_indices(a, b):
+    match = Match("测试", seed=0)
+    conn = SimpleNamespace(account="", camp=match.engine.camps[0])
+    count = len(match.engine.paths)
+    assert match.command(conn, {"type": "add", "a": a, "b": b}) == "球的编号不对"
+    assert len(match.engine.paths) == count
+
+
+def test_command_checks_owner():
+    match = Match("测试", seed=0)
+    engine = match.engine
+    mine = next(b.idx for b in engine.balls if b.camp is engine.camps[0])
+    theirs = next(b.idx for b in engine.balls if b.camp is not engine.camps[0])
+    conn = SimpleNamespace(account="", camp=engine.camps[0])
+    assert match.command(conn, {"type": "add", "a": theirs, "b": mine}) == "只能从自己的球连线"
+    assert match.command(conn, {"type": "add", "a": mine, "b": theirs}) is None
+    assert (mine, theirs) in engine.paths
+    other = SimpleNamespace(account="", camp=engine.camps[1])
+    assert match.command(other, {"type": "remove", "a": mine, "b": theirs}) == "只能删自己的路径"
+    assert match.command(conn, {"type": "remove", "a": mine, "b": theirs}) is None
+    assert (mine, theirs) not in engine.paths
+
+
+async def bad_messages():
+    server = Server(seed=0)
+    port = await server.start("127.0.0.1", 0)
+    client = Client()
+    await client.connect("127.0.0.1", port)
+    try:
+        client.send(type="add", a=0, b=1)
+        client.writer.write(b"{not json\n")
+        client.send(type="join", match="房间", camps="两个")
+        client.send(type="hello")
+        await client.join("房间")
+        client.send(type="add", a=True, b=1)
+        while len(client.errors) < 5:  # 前 4 条在 join 等 state 时已经收到
+            await client.recv()
+        # 超过 StreamReader 上限的一行：回一条错误后断开
+        client.writer.write(json.dumps({"type": "add", "pad": "x" * 100000}).encode() + b"\n")
+        with pytest.raises(ConnectionError):
+            while True:
+                await client.recv()
+        return client.errors
+    finally:
+        client.writer.close()
+        await server.close()
+
+
+def test_bad_messages_are_rejected():
+    errors = asyncio.run(bad_messages())
+    assert errors == ["还没有加入房间", "消息格式不对", "阵营数不对", "不认识的消息类型 hello",
+                      "球的编号不对", "消息太长"]
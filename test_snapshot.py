@@ -0,0 +1,19 @@
+"""快照：分叉出来的对局、恢复快照后的对局和原来的走法一样"""
+import random
+
+import pytest
+
+from conftest import autoplay, scripted
+from snapshot import fork, restore, snapshot
+
+
+@pytest.mark.parametrize("mode,camp_count", [("grid", 2), ("streams", 2), ("grid", 4), ("streams", 3)])
+def test_fork_and_restore_are_deterministic(mode, camp_count):
+    engine = autoplay(3, mode, camp_count)
+    for _ in range(1500):
+        engine.update_game_logic()
+    data = snapshot(engine)
+    expected = scripted(engine, 2000, random.Random(9))
+    assert scripted(fork(data), 2000, random.Random(9)) == expected
+    restore(engine, data)
+    assert scripted(engine, 2000, random.Random(9)) == expected
@@ -0,0 +1,64 @@
+"""按路径成批抵消：相遇表和逐帧比距离一致，整局抵消数和每帧做网格抵消的差不多"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from conftest import autoplay
+from streams import Stream, pair_geometry
+
+
+def brute_ages(a, b, radius):
+    """d -> a 飞了几帧时第一次相距小于 radius（逐帧比较）"""
+    fa, fb = a.flight - 1, b.flight - 1
+    ages = {}
+    for d in range(-fa, fb + 1):
+        for k in range(max(0, -d), min(fa, fb - d) + 1):
+            # 和网格抵消一样先算位置再比距离
+            pa = np.add(a.origin, np.multiply(a.vel, float(k)))
+            pb = np.add(b.origin, np.multiply(b.vel, float(k + d)))
+            if np.hypot(pa[0] - pb[0], pa[1] - pb[1]) < radius:
+                ages[d] = k
+                break
+    return ages
+
+
+def random_stream(rng, key):
+    x, y = rng.uniform(0, 200), rng.uniform(0, 200)
+    angle = rng.uniform(0, 2 * math.pi)
+    return Stream(key, (x, y), (math.cos(angle), math.sin(angle)), rng.randint(5, 150))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_pair_geometry_matches_per_tick_distances(seed):
+    rng = random.Random(seed)
+    for n in range(150):
+        a = random_stream(rng, (0, 1, 0))
+        if n % 3 == 0:
+            # 对穿：b 从 a 的终点沿原路飞回来
+            end = (a.origin[0] + a.vel[0] * a.flight, a.origin[1] + a.vel[1] * a.flight)
+            b = Stream((1, 0, 1), end, (-a.vel[0], -a.vel[1]), a.flight)
+        else:
+            b = random_stream(rng, (2, 3, 1))
+        expected = brute_ages(a, b, 10)
+        geom = pair_geometry(a, b, 10)
+        if geom is None:
+            assert not expected
+            continue
+        lo, hi, ages = geom
+        got = {d: age for d, age in zip(range(lo, hi + 1), ages) if age >= 0}
+        assert got == expected
+
+
+@pytest.mark.parametrize("seed", [0, 1, 3])
+def test_cancel_counts_follow_every_frame_grid(seed):
+    counts = {}
+    for mode in ("grid", "streams"):
+        engine = autoplay(seed, mode, camp_count=3)
+        engine.cancel_interval = 1
+        for _ in range(3000):
+            engine.update_game_logic()
+        counts[mode] = engine.projectiles.cancel_count
+    assert counts["grid"] > 0
+    assert abs(counts["streams"] - counts["grid"]) <= 0.03 * counts["grid"] + 2